@@ -0,0 +1,276 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, delete, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from .chat_store import load_engine
+from .config import (
+    ANSWER_CACHE_BACKEND,
+    ANSWER_CACHE_FILE,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_REFRESH_SECONDS,
+    ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ANSWER_CACHE_TABLE_NAME,
+    ANSWER_CACHE_TTL_SECONDS,
+)
+
+
+class MemoryAnswerCacheBackend:
+    shared = False
+
+    def load(self):
+        return []
+
+    def add(self, entry):
+        pass
+
+    def touch(self, key, last_used_at):
+        pass
+
+    def remove(self, keys):
+        pass
+
+
+class FileAnswerCacheBackend:
+    shared = False
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self._entries = {entry["key"]: entry for entry in json.load(f)}
+
+        return list(self._entries.values())
+
+    def add(self, entry):
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            self._save()
+
+    def touch(self, key, last_used_at):
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]["last_used_at"] = last_used_at
+                self._save()
+
+    def remove(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(list(self._entries.values()), f)
+        os.replace(temporary_path, self.path)
+
+
+class PostgresAnswerCacheBackend:
+    # Entries written by other workers are picked up on the next refresh
+    shared = True
+
+    def __init__(self, table_name=ANSWER_CACHE_TABLE_NAME):
+        self.engine = load_engine()
+        self.table = Table(
+            table_name,
+            MetaData(),
+            Column("key", String, primary_key=True),
+            Column("query", Text, nullable=False),
+            Column("answer", Text, nullable=False),
+            Column("embedding", ARRAY(Float), nullable=False),
+            Column("run_seconds", Float, nullable=False),
+            Column("created_at", Float, nullable=False),
+            Column("last_used_at", Float, nullable=False),
+        )
+        self.table.create(self.engine, checkfirst=True)
+
+    def load(self):
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(self.table)).mappings().all()
+
+        return [dict(row) for row in rows]
+
+    def add(self, entry):
+        with self.engine.begin() as connection:
+            connection.execute(self.table.insert().values(**entry))
+
+    def touch(self, key, last_used_at):
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(self.table)
+                .where(self.table.c.key == key)
+                .values(last_used_at=last_used_at)
+            )
+
+    def remove(self, keys):
+        if not keys:
+            return
+
+        with self.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.key.in_(keys)))
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        backend,
+        similarity_threshold=ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        refresh_seconds=ANSWER_CACHE_REFRESH_SECONDS,
+    ):
+        self.backend = backend
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+
+        # Least recently used first
+        self._entries = OrderedDict()
+        self._keys = []
+        self._matrix = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._saved_seconds = 0.0
+
+        self._reload()
+
+    def lookup(self, embedding):
+        now = time.time()
+
+        if self.backend.shared and now - self._loaded_at > self.refresh_seconds:
+            self._reload()
+
+        with self._lock:
+            expired = self._expire(now)
+            key, similarity = self._nearest(embedding)
+
+            if key is None or similarity < self.similarity_threshold:
+                self._misses += 1
+                entry = None
+            else:
+                self._hits += 1
+                entry = self._entries[key]
+                entry["last_used_at"] = now
+                self._entries.move_to_end(key)
+                self._saved_seconds += entry["run_seconds"]
+
+        self.backend.remove(expired)
+
+        if entry is None:
+            return None
+
+        self.backend.touch(entry["key"], now)
+        return entry["answer"]
+
+    def store(self, query, embedding, answer, run_seconds):
+        now = time.time()
+        entry = {
+            "key": uuid.uuid4().hex,
+            "query": query,
+            "answer": answer,
+            "embedding": [float(value) for value in self._normalize(embedding)],
+            "run_seconds": run_seconds,
+            "created_at": now,
+            "last_used_at": now,
+        }
+
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            self._matrix = None
+            self._stores += 1
+            evicted = self._expire(now) + self._evict_overflow()
+
+        self.backend.add(entry)
+        self.backend.remove(evicted)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "stores": self._stores,
+                "evictions": self._evictions,
+                "saved_seconds": round(self._saved_seconds, 3),
+            }
+
+    def _reload(self):
+        entries = sorted(self.backend.load(), key=lambda entry: entry["last_used_at"])
+
+        with self._lock:
+            self._entries = OrderedDict((entry["key"], entry) for entry in entries)
+            self._matrix = None
+            self._loaded_at = time.time()
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items()
+                   if now - entry["created_at"] > self.ttl_seconds]
+
+        return self._drop(expired)
+
+    def _evict_overflow(self):
+        overflow = len(self._entries) - self.max_entries
+        return self._drop(list(self._entries)[:overflow]) if overflow > 0 else []
+
+    def _drop(self, keys):
+        for key in keys:
+            del self._entries[key]
+
+        if keys:
+            self._matrix = None
+            self._evictions += len(keys)
+
+        return keys
+
+    def _nearest(self, embedding):
+        if not self._entries:
+            return None, 0.0
+
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.array([self._entries[key]["embedding"] for key in self._keys])
+
+        similarities = self._matrix @ self._normalize(embedding)
+        best = int(np.argmax(similarities))
+
+        return self._keys[best], float(similarities[best])
+
+    def _normalize(self, embedding):
+        vector = np.asarray(embedding, dtype=np.float64)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+ANSWER_CACHE_BACKENDS = {
+    "memory": MemoryAnswerCacheBackend,
+    "file": lambda: FileAnswerCacheBackend(ANSWER_CACHE_FILE),
+    "postgres": PostgresAnswerCacheBackend,
+}
+
+
+def load_answer_cache(backend=ANSWER_CACHE_BACKEND):
+    if not backend:
+        return None
+
+    return SemanticAnswerCache(ANSWER_CACHE_BACKENDS[backend]())
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+
+from llama_index.core.llms import ChatMessage
+from llama_index.storage.chat_store.postgres import PostgresChatStore
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from .config import (
+    CHAT_STORE_MAX_OVERFLOW,
+    CHAT_STORE_POOL_RECYCLE,
+    CHAT_STORE_POOL_SIZE,
+    CHAT_STORE_POOL_TIMEOUT,
+    CHAT_STORE_TABLE_NAME,
+    POSTGRES_CHAT_STORE_URI,
+)
+
+
+DISPLAY_ROLES = ("user", "assistant")
+
+_chat_store = None
+_engine = None
+_async_engine = None
+_lock = threading.Lock()
+
+
+def _pool_options():
+    return {
+        "pool_size": CHAT_STORE_POOL_SIZE,
+        "max_overflow": CHAT_STORE_MAX_OVERFLOW,
+        "pool_timeout": CHAT_STORE_POOL_TIMEOUT,
+        "pool_recycle": CHAT_STORE_POOL_RECYCLE,
+        # Check connections on checkout so a restarted Postgres doesn't fail the next request
+        "pool_pre_ping": True,
+    }
+
+
+def _database_urls(uri):
+    url = make_url(uri)
+    sync_url = url.set(drivername="postgresql+psycopg")
+
+    # asyncpg doesn't understand libpq's sslmode, it takes ssl instead
+    query = dict(url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    async_url = url.set(drivername="postgresql+asyncpg", query=query)
+
+    return sync_url, async_url
+
+
+def _create_chat_store():
+    global _engine, _async_engine
+
+    sync_url, async_url = _database_urls(POSTGRES_CHAT_STORE_URI)
+    _engine = create_engine(sync_url, **_pool_options())
+    _async_engine = create_async_engine(async_url, **_pool_options())
+
+    return PostgresChatStore(
+        session=sessionmaker(_engine),
+        async_session=sessionmaker(_async_engine, class_=AsyncSession),
+        table_name=CHAT_STORE_TABLE_NAME,
+    )
+
+
+def load_chat_store():
+    global _chat_store
+
+    if _chat_store is None:
+        with _lock:
+            if _chat_store is None:
+                _chat_store = _create_chat_store()
+
+    return _chat_store
+
+
+def load_engine():
+    load_chat_store()
+    return _engine
+
+
+def chat_store_healthy():
+    try:
+        with load_engine().connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception:
+        return False
+
+    return True
+
+
+def _pool_stats(pool):
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+def pool_status():
+    # Only reports pools that exist, metrics shouldn't connect to the database themselves
+    if _engine is None:
+        return None
+
+    return {"sync": _pool_stats(_engine.pool), "async": _pool_stats(_async_engine.pool)}
+
+
+async def aload_chat_store():
+    # Building the store checks and creates its table with blocking calls, off the event loop
+    if _chat_store is None:
+        return await asyncio.to_thread(load_chat_store)
+
+    return _chat_store
+
+
+def _message_page_query(chat_store):
+    # A position is the 1-based index of a message in the chat history. Messages are only ever
+    # appended, so it is a stable cursor: pages hold the latest `limit` messages before it
+    table = chat_store._table_class.__table__
+
+    # Each chat is a single row holding an array of messages, so page over the unnested array.
+    # The column is json[] or jsonb[] depending on how the table was created, so messages are
+    # cast to jsonb once. Messages without text (such as tool calls) are skipped here, so the
+    # limit and the cursor count the same messages that are returned
+    return text(f"""
+        SELECT item.position, item.message
+        FROM (
+          SELECT item.position, CAST(item.message AS jsonb) AS message
+          FROM {table.fullname}, unnest(value) WITH ORDINALITY AS item(message, position)
+          WHERE key = :key
+            AND (CAST(:before AS BIGINT) IS NULL OR item.position < :before)
+        ) AS item
+        WHERE item.message ->> 'role' = ANY(:roles)
+          AND (
+            btrim(COALESCE(item.message ->> 'content', '')) <> ''
+            OR EXISTS (
+              SELECT 1
+              FROM jsonb_array_elements(COALESCE(item.message -> 'blocks', '[]'::jsonb)) AS block
+              WHERE btrim(COALESCE(block ->> 'text', '')) <> ''
+            )
+          )
+        ORDER BY item.position DESC
+        LIMIT :limit
+    """)
+
+
+def _message_page(rows, limit):
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    messages = [(position, ChatMessage.model_validate(message))
+                for position, message in reversed(rows[:limit])]
+
+    return messages, next_cursor
+
+
+def get_message_page(chat_key, limit, before=None, roles=DISPLAY_ROLES):
+    query = _message_page_query(load_chat_store())
+
+    with _engine.connect() as connection:
+        rows = connection.execute(query, {
+            "key": chat_key,
+            "before": before,
+            "roles": list(roles),
+            "limit": limit + 1,
+        }).all()
+
+    return _message_page(rows, limit)
+
+
+async def aget_message_page(chat_key, limit, before=None, roles=DISPLAY_ROLES):
+    query = _message_page_query(await aload_chat_store())
+
+    async with _async_engine.connect() as connection:
+        rows = (await connection.execute(query, {
+            "key": chat_key,
+            "before": before,
+            "roles": list(roles),
+            "limit": limit + 1,
+        })).all()
+
+    return _message_page(rows, limit)
@@ -5,13 +5,51 @@ from pinecone import ServerlessSpec
 # Hugging Face Embeddings Model
 EMBEDDINGS_MODEL_NAME = "mixedbread-ai/mxbai-embed-large-v1"
 
+# Embeddings Backend: "api" (Hugging Face Inference API) or "openvino" (local CPU inference)
+EMBEDDINGS_BACKEND = os.environ.get("EMBEDDINGS_BACKEND", "api")
+# Exported (optionally int8) OpenVINO model, see export_embed_model.py
+EMBEDDINGS_LOCAL_MODEL_PATH = os.environ.get("EMBEDDINGS_LOCAL_MODEL_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "mxbai-embed-large-v1-openvino"
+)
+# Local vectors must stay this close (cosine) to the API's to query the existing index
+EMBEDDINGS_PARITY_MIN_SIMILARITY = 0.99
+EMBEDDINGS_PARITY_TEXTS = [
+    "data engineering project ideas with Kafka",
+    "MLOps pipeline with MLflow, Prefect and model monitoring",
+    "Batch processing of NYC taxi trips with Spark and BigQuery",
+]
+
 
 # LLM Configuration
 LLM_MODEL = "gemini-2.5-flash-lite"
 
+# LLM Clients (shared per process): calls beyond LLM_MAX_CONCURRENCY wait for a slot, and fail
+# after LLM_QUEUE_TIMEOUT seconds in line
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY") or 8)
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT") or 30)
+LLM_REQUEST_TIMEOUT = 120
+
+# Vector Store Backend: "pinecone" (serverless index) or "local" (on-disk IVF index)
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "pinecone")
+
+# Local Vector Index (built by ingestion/readme_embedder)
+LOCAL_INDEX_DIR = os.environ.get("LOCAL_INDEX_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "vector_index"
+)
+LOCAL_INDEX_NPROBE = int(os.environ.get("LOCAL_INDEX_NPROBE") or 16)
+
+# Keyword (BM25) index over the same chunks, built by ingestion/readme_embedder next to the
+# vector index. Without the file the tool falls back to dense retrieval only
+SPARSE_INDEX_FILE = os.environ.get("SPARSE_INDEX_FILE") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data",
+    f"sparse_index-{VECTOR_STORE_BACKEND}.sqlite3",
+)
+
 # Pinecone Index and Vector Store Settings
 INDEX_NAME = "capstone-project-recommender-index"
 EMBEDDING_DIMENSION = 1024
+# Host of the index (see the Pinecone console), saves looking it up when the server starts
+PINECONE_INDEX_HOST = os.environ.get("PINECONE_INDEX_HOST") or ""
 
 # Free Indexes in Pinecone are limited to this Spec
 INDEX_SPEC = ServerlessSpec(cloud="aws", region="us-east-1")
@@ -20,11 +58,59 @@ INDEX_SPEC = ServerlessSpec(cloud="aws", region="us-east-1")
 # Similarity Search Settings
 SIMILARITY_TOP_K = 40
 
+# Projects Tool Mode: "query_engine" (tool synthesizes an answer with its own LLM call) or
+# "retriever" (tool returns snippets and the agent's LLM does the only synthesis)
+TOOL_MODE = os.environ.get("TOOL_MODE", "query_engine")
+SNIPPET_MAX_CHARACTERS = 600
+
+# Hybrid Retrieval: dense and BM25 results (SIMILARITY_TOP_K each) fused with reciprocal-rank
+# fusion, of which the top HYBRID_TOP_K are kept
+HYBRID_RETRIEVAL = os.environ.get("HYBRID_RETRIEVAL", "true") == "true"
+HYBRID_TOP_K = int(os.environ.get("HYBRID_TOP_K") or 20)
+RRF_K = 60
+
+# Retrieval Diversification: keep the best chunks per README, then pick with MMR until the
+# context token budget is spent
+DIVERSIFY_RETRIEVAL = os.environ.get("DIVERSIFY_RETRIEVAL", "true") == "true"
+MAX_CHUNKS_PER_PROJECT = int(os.environ.get("MAX_CHUNKS_PER_PROJECT") or 2)
+MMR_LAMBDA = float(os.environ.get("MMR_LAMBDA") or 0.7)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET") or 6000)
+
 
 # Chat Memory Settings
 POSTGRES_CHAT_STORE_URI = os.environ.get("POSTGRES_CHAT_STORE_URI") or ""
 CHAT_MEMORY_TOKEN_LIMIT = 3000
+CHAT_STORE_TABLE_NAME = "chatstore"
+
+# Chat Store Connection Pool (shared by the agent and the backend in each process)
+CHAT_STORE_POOL_SIZE = int(os.environ.get("CHAT_STORE_POOL_SIZE") or 5)
+CHAT_STORE_MAX_OVERFLOW = int(os.environ.get("CHAT_STORE_MAX_OVERFLOW") or 5)
+CHAT_STORE_POOL_TIMEOUT = 30
+CHAT_STORE_POOL_RECYCLE = 30 * 60
 
 
 # Hugging Face Hub API Token
 HUGGINGFACEHUB_API_TOKEN = os.environ.get("HUGGINGFACEHUB_API_TOKEN") or ""
+
+
+# Semantic Answer Cache for first-turn questions ("memory", "file", "postgres" or "" to disable)
+ANSWER_CACHE_BACKEND = os.environ.get("ANSWER_CACHE_BACKEND", "memory")
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD") or 0.95
+)
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get("ANSWER_CACHE_TTL_SECONDS") or 7 * 24 * 60 * 60)
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES") or 1000)
+ANSWER_CACHE_REFRESH_SECONDS = 5 * 60
+ANSWER_CACHE_FILE = os.environ.get("ANSWER_CACHE_FILE") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "answer_cache.json"
+)
+ANSWER_CACHE_TABLE_NAME = "answer_cache"
+
+
+# Query Embedding Cache (in-memory LRU, plus an optional "disk" or "postgres" second tier)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES") or 4096)
+EMBEDDING_CACHE_STORE = os.environ.get("EMBEDDING_CACHE_STORE", "")
+EMBEDDING_CACHE_FILE = os.environ.get("EMBEDDING_CACHE_FILE") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings.sqlite3"
+)
+EMBEDDING_CACHE_TABLE_NAME = "embedding_cache"
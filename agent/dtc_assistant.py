@@ -1,25 +1,34 @@
+import asyncio
 import os
+import time
 
 from llama_index.core import VectorStoreIndex
-from llama_index.core.agent.workflow import FunctionAgent
-from llama_index.llms.google_genai import GoogleGenAI
+from llama_index.core.agent.workflow import AgentStream, FunctionAgent, ToolCall, ToolCallResult
+from llama_index.core.llms import ChatMessage
 
+from .answer_cache import load_answer_cache
 from .chat_memory import load_chat_memory
-from .config import LLM_MODEL
+from .chat_store import load_chat_store, pool_status
 from .embed_model import load_embed_model
+from .llm import load_llm
+from .llm_limiter import llm_limiter
 from .vector_store import load_vector_store
-from .tools import query_engine_tool
+from .tools import projects_tool
 
 
 class DataTalksClubAssistant:
     def __init__(self):
+        self.embed_model = load_embed_model()
         self.vector_index = VectorStoreIndex.from_vector_store(
             vector_store=load_vector_store(),
-            embed_model=load_embed_model(),
+            embed_model=self.embed_model,
         )
-        self.tools = [query_engine_tool(self.vector_index)]
-        self.llm = GoogleGenAI(model=LLM_MODEL)
+        self.tools = [projects_tool(self.vector_index)]
+        self.llm = load_llm()
         self.load_memory = load_chat_memory
+        # Connects and creates the chat table here, so the first chat doesn't block the loop
+        self.chat_store = load_chat_store()
+        self.answer_cache = load_answer_cache()
 
         self.agent = FunctionAgent(
             tools=self.tools,
@@ -36,11 +45,87 @@ class DataTalksClubAssistant:
         with open(prompt_path, "r") as f:
             return f.read()
 
+    async def __cache_embedding(self, user_input, chat_memory):
+        # Only first questions are cached, later answers depend on the conversation so far
+        if self.answer_cache is None or await chat_memory.aget_all():
+            return None
+
+        return await self.embed_model.aget_query_embedding(user_input)
+
+    async def __cached_answer(self, user_input, chat_memory, embedding):
+        if embedding is None:
+            return None
+
+        answer = await asyncio.to_thread(self.answer_cache.lookup, embedding)
+
+        if answer is not None:
+            await chat_memory.aput(ChatMessage(role="user", content=user_input))
+            await chat_memory.aput(ChatMessage(role="assistant", content=answer))
+
+        return answer
+
+    async def __cache_answer(self, user_input, embedding, answer, started_at):
+        if embedding is None:
+            return
+
+        await asyncio.to_thread(
+            self.answer_cache.store, user_input, embedding, answer, time.perf_counter() - started_at
+        )
+
     async def run(self, user_input, chat_id):
         chat_memory = self.load_memory(chat_id)
+        embedding = await self.__cache_embedding(user_input, chat_memory)
+        cached_answer = await self.__cached_answer(user_input, chat_memory, embedding)
+
+        if cached_answer is not None:
+            return cached_answer
+
+        started_at = time.perf_counter()
         response = await self.agent.run(
             user_input,
             memory=chat_memory
         )
 
-        return response.response.content
+        answer = response.response.content
+        await self.__cache_answer(user_input, embedding, answer, started_at)
+
+        return answer
+
+    async def stream(self, user_input, chat_id):
+        chat_memory = self.load_memory(chat_id)
+        embedding = await self.__cache_embedding(user_input, chat_memory)
+        cached_answer = await self.__cached_answer(user_input, chat_memory, embedding)
+
+        if cached_answer is not None:
+            yield {"type": "token", "content": cached_answer}
+            yield {"type": "done", "content": cached_answer}
+            return
+
+        started_at = time.perf_counter()
+        handler = self.agent.run(
+            user_input,
+            memory=chat_memory
+        )
+
+        async for event in handler.stream_events():
+            if isinstance(event, ToolCallResult):
+                yield {"type": "tool_result", "tool_name": event.tool_name}
+            elif isinstance(event, ToolCall):
+                yield {"type": "tool_call", "tool_name": event.tool_name}
+            elif isinstance(event, AgentStream) and event.delta:
+                yield {"type": "token", "content": event.delta}
+
+        # The workflow writes the finished exchange to chat memory before it resolves
+        response = await handler
+        answer = response.response.content
+        await self.__cache_answer(user_input, embedding, answer, started_at)
+
+        yield {"type": "done", "content": answer}
+
+    def metrics(self):
+        return {
+            "answer_cache": self.answer_cache.stats() if self.answer_cache else None,
+            "embedding_cache": self.embed_model.stats(),
+            "llm": llm_limiter.stats(),
+            "chat_store_pool": pool_status(),
+        }
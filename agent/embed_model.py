@@ -1,11 +1,95 @@
-# from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+import logging
+import os
+import threading
+import time
+
+import numpy as np
 from llama_index.embeddings.huggingface_api import HuggingFaceInferenceAPIEmbedding
 
-from .config import EMBEDDINGS_MODEL_NAME, HUGGINGFACEHUB_API_TOKEN
+from .config import (
+    EMBEDDINGS_BACKEND,
+    EMBEDDINGS_LOCAL_MODEL_PATH,
+    EMBEDDINGS_MODEL_NAME,
+    EMBEDDINGS_PARITY_MIN_SIMILARITY,
+    EMBEDDINGS_PARITY_TEXTS,
+    HUGGINGFACEHUB_API_TOKEN,
+)
+from .embedding_cache import CachedEmbedding, load_embedding_store
+
+
+logger = logging.getLogger(__name__)
 
+_local_embed_model = None
+_lock = threading.Lock()
 
-def load_embed_model():
+
+def load_api_embed_model():
     return HuggingFaceInferenceAPIEmbedding(
         model_name=EMBEDDINGS_MODEL_NAME,
         token=HUGGINGFACEHUB_API_TOKEN,
     )
+
+
+def load_local_embed_model():
+    # OpenVINO is only needed (and only imported) when serving with the local backend
+    from llama_index.embeddings.huggingface_openvino import OpenVINOEmbedding
+
+    # Compiling the model takes seconds and a few GB, so every caller in the process shares one
+    global _local_embed_model
+
+    if _local_embed_model is None:
+        with _lock:
+            if _local_embed_model is None:
+                model_path = (
+                    EMBEDDINGS_LOCAL_MODEL_PATH if os.path.isdir(EMBEDDINGS_LOCAL_MODEL_PATH)
+                    else EMBEDDINGS_MODEL_NAME
+                )
+                embed_model = OpenVINOEmbedding(model_id_or_path=model_path, device="cpu")
+                warm_up(embed_model)
+                _local_embed_model = embed_model
+
+    return _local_embed_model
+
+
+def warm_up(embed_model):
+    started_at = time.perf_counter()
+    embed_model.get_query_embedding(EMBEDDINGS_PARITY_TEXTS[0])
+    logger.info("Embedding model warmed up in %.2fs", time.perf_counter() - started_at)
+
+
+def embedding_parity(embed_model, reference_model, texts=EMBEDDINGS_PARITY_TEXTS):
+    similarities = []
+
+    for text in texts:
+        vector = np.asarray(embed_model.get_query_embedding(text))
+        reference = np.asarray(reference_model.get_query_embedding(text))
+        similarities.append(
+            float(vector @ reference / (np.linalg.norm(vector) * np.linalg.norm(reference)))
+        )
+
+    return min(similarities)
+
+
+def check_embedding_parity(embed_model, reference_model=None):
+    similarity = embedding_parity(embed_model, reference_model or load_api_embed_model())
+
+    if similarity < EMBEDDINGS_PARITY_MIN_SIMILARITY:
+        raise ValueError(
+            f"Local embeddings diverge from {EMBEDDINGS_MODEL_NAME} (min cosine {similarity:.4f} "
+            f"< {EMBEDDINGS_PARITY_MIN_SIMILARITY}), they can't be used with the existing index"
+        )
+
+    return similarity
+
+
+EMBEDDINGS_BACKENDS = {
+    "api": load_api_embed_model,
+    "openvino": load_local_embed_model,
+}
+
+
+def load_embed_model(backend=EMBEDDINGS_BACKEND):
+    return CachedEmbedding(
+        EMBEDDINGS_BACKENDS[backend](),
+        store=load_embedding_store(),
+    )
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+from sqlalchemy import Column, Float, MetaData, String, Table, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from .chat_store import load_engine
+from .config import (
+    EMBEDDING_CACHE_FILE,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_STORE,
+    EMBEDDING_CACHE_TABLE_NAME,
+)
+
+
+class DiskEmbeddingStore:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT embedding FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+
+        return np.frombuffer(row[0], dtype=np.float32).tolist() if row else None
+
+    def set(self, key, embedding):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO embeddings (key, embedding) VALUES (?, ?)",
+                (key, np.asarray(embedding, dtype=np.float32).tobytes()),
+            )
+
+
+class PostgresEmbeddingStore:
+    def __init__(self, table_name=EMBEDDING_CACHE_TABLE_NAME):
+        self.engine = load_engine()
+        self.table = Table(
+            table_name,
+            MetaData(),
+            Column("key", String, primary_key=True),
+            Column("embedding", ARRAY(Float), nullable=False),
+        )
+        self.table.create(self.engine, checkfirst=True)
+
+    def get(self, key):
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(self.table.c.embedding).where(self.table.c.key == key)
+            ).scalar()
+
+    def set(self, key, embedding):
+        with self.engine.begin() as connection:
+            connection.execute(
+                insert(self.table)
+                .values(key=key, embedding=list(embedding))
+                .on_conflict_do_nothing(index_elements=["key"])
+            )
+
+
+class CachedEmbedding(BaseEmbedding):
+    _embed_model = PrivateAttr()
+    _store = PrivateAttr()
+    _max_entries = PrivateAttr()
+    _entries = PrivateAttr()
+    _lock = PrivateAttr()
+    _counts = PrivateAttr()
+
+    def __init__(self, embed_model, store=None, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+        )
+        self._embed_model = embed_model
+        self._store = store
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    @classmethod
+    def class_name(cls):
+        return "CachedEmbedding"
+
+    def _key(self, kind, text):
+        normalized_text = " ".join(text.split())
+        digest = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _remember(self, key, embedding):
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._lock:
+            embedding = self._entries.get(key)
+
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return embedding
+
+        embedding = self._store.get(key) if self._store else None
+
+        with self._lock:
+            self._counts["store_hits" if embedding is not None else "misses"] += 1
+
+        if embedding is not None:
+            self._remember(key, embedding)
+
+        return embedding
+
+    def _save(self, key, embedding):
+        self._remember(key, embedding)
+
+        if self._store:
+            self._store.set(key, embedding)
+
+    def _cached(self, kind, text, embed):
+        key = self._key(kind, text)
+        embedding = self._lookup(key)
+
+        if embedding is None:
+            embedding = embed(text)
+            self._save(key, embedding)
+
+        return embedding
+
+    async def _acached(self, kind, text, aembed):
+        key = self._key(kind, text)
+        embedding = await asyncio.to_thread(self._lookup, key)
+
+        if embedding is None:
+            embedding = await aembed(text)
+            await asyncio.to_thread(self._save, key, embedding)
+
+        return embedding
+
+    def _get_query_embedding(self, query):
+        return self._cached("query", query, self._embed_model.get_query_embedding)
+
+    async def _aget_query_embedding(self, query):
+        return await self._acached("query", query, self._embed_model.aget_query_embedding)
+
+    def _get_text_embedding(self, text):
+        return self._cached("text", text, self._embed_model.get_text_embedding)
+
+    async def _aget_text_embedding(self, text):
+        return await self._acached("text", text, self._embed_model.aget_text_embedding)
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self._counts.values())
+            hits = self._counts["memory_hits"] + self._counts["store_hits"]
+            return {
+                "entries": len(self._entries),
+                **self._counts,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+EMBEDDING_CACHE_STORES = {
+    "disk": lambda: DiskEmbeddingStore(EMBEDDING_CACHE_FILE),
+    "postgres": PostgresEmbeddingStore,
+}
+
+
+def load_embedding_store(store=EMBEDDING_CACHE_STORE):
+    return EMBEDDING_CACHE_STORES[store]() if store else None
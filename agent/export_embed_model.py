@@ -0,0 +1,38 @@
+import argparse
+
+from llama_index.embeddings.huggingface_openvino import OpenVINOEmbedding
+from optimum.intel import OVModelForFeatureExtraction, OVWeightQuantizationConfig
+from transformers import AutoTokenizer
+
+from .config import EMBEDDINGS_LOCAL_MODEL_PATH, EMBEDDINGS_MODEL_NAME
+from .embed_model import check_embedding_parity
+
+
+def export_embed_model(output_path, int8=False):
+    quantization_config = OVWeightQuantizationConfig(bits=8) if int8 else None
+    model = OVModelForFeatureExtraction.from_pretrained(
+        EMBEDDINGS_MODEL_NAME,
+        export=True,
+        quantization_config=quantization_config,
+    )
+    model.save_pretrained(output_path)
+    AutoTokenizer.from_pretrained(EMBEDDINGS_MODEL_NAME).save_pretrained(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=f"Export {EMBEDDINGS_MODEL_NAME} to OpenVINO for local CPU serving"
+    )
+    parser.add_argument("--output", default=EMBEDDINGS_LOCAL_MODEL_PATH)
+    parser.add_argument("--int8", action="store_true", help="Quantize weights to int8")
+    args = parser.parse_args()
+
+    export_embed_model(args.output, int8=args.int8)
+    local_model = OpenVINOEmbedding(model_id_or_path=args.output, device="cpu")
+    similarity = check_embedding_parity(local_model)
+
+    print(f"✅ Exported to {args.output}, min cosine similarity to the API: {similarity:.4f}")
+
+
+if __name__ == "__main__":
+    main()
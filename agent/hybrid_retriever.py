@@ -0,0 +1,72 @@
+import asyncio
+from collections import defaultdict
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore
+
+from .config import RRF_K
+
+
+def reciprocal_rank_fusion(result_lists, k=RRF_K):
+    scores = defaultdict(float)
+    nodes = {}
+
+    for results in result_lists:
+        for rank, node_with_score in enumerate(results):
+            node_id = node_with_score.node.node_id
+            scores[node_id] += 1.0 / (k + rank + 1)
+            # The first list's copy wins, dense results may carry embeddings the others don't
+            nodes.setdefault(node_id, node_with_score.node)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in ranked]
+
+
+class SparseRetriever(BaseRetriever):
+    def __init__(self, sparse_index, similarity_top_k, filters=None):
+        super().__init__()
+        self.sparse_index = sparse_index
+        self.similarity_top_k = similarity_top_k
+        self.filters = filters
+
+    def _retrieve(self, query_bundle):
+        return [
+            NodeWithScore(node=node, score=score)
+            for node, score in self.sparse_index.query(
+                query_bundle.query_str, self.similarity_top_k, self.filters
+            )
+        ]
+
+    async def _aretrieve(self, query_bundle):
+        return await asyncio.to_thread(self._retrieve, query_bundle)
+
+
+# Dense similarity misses exact tool names ("dbt", "Kestra", "Mage") that BM25 ranks first, so
+# both rankings are merged with reciprocal-rank fusion and only the fused top is kept. The
+# keyword index may be written after the retriever is built, so it is looked for on every query
+class HybridRetriever(BaseRetriever):
+    def __init__(self, dense_retriever, sparse_retriever, similarity_top_k):
+        super().__init__()
+        self.dense_retriever = dense_retriever
+        self.sparse_retriever = sparse_retriever
+        self.similarity_top_k = similarity_top_k
+
+    def _retrieve(self, query_bundle):
+        if not self.sparse_retriever.sparse_index.exists():
+            return self.dense_retriever.retrieve(query_bundle)
+
+        result_lists = [
+            retriever.retrieve(query_bundle)
+            for retriever in (self.dense_retriever, self.sparse_retriever)
+        ]
+        return reciprocal_rank_fusion(result_lists)[:self.similarity_top_k]
+
+    async def _aretrieve(self, query_bundle):
+        if not self.sparse_retriever.sparse_index.exists():
+            return await self.dense_retriever.aretrieve(query_bundle)
+
+        result_lists = await asyncio.gather(
+            self.dense_retriever.aretrieve(query_bundle),
+            self.sparse_retriever.aretrieve(query_bundle),
+        )
+        return reciprocal_rank_fusion(result_lists)[:self.similarity_top_k]
@@ -0,0 +1,63 @@
+import threading
+
+from google import genai
+from google.genai import types
+from llama_index.llms.google_genai import GoogleGenAI
+
+from .config import LLM_MODEL, LLM_REQUEST_TIMEOUT
+from .llm_limiter import llm_limiter
+
+
+_llms = {}
+_genai_client = None
+_lock = threading.Lock()
+
+
+class LimitedGoogleGenAI(GoogleGenAI):
+    # The async paths the agent and query engines use, a stream holds its slot until it ends.
+    # Sync calls are not limited
+    async def achat(self, messages, **kwargs):
+        async with llm_limiter.slot():
+            return await super().achat(messages, **kwargs)
+
+    async def acomplete(self, prompt, formatted=False, **kwargs):
+        async with llm_limiter.slot():
+            return await super().acomplete(prompt, formatted=formatted, **kwargs)
+
+    async def astream_chat(self, messages, **kwargs):
+        astream_chat = super().astream_chat
+
+        async def gen():
+            async with llm_limiter.slot():
+                async for response in await astream_chat(messages, **kwargs):
+                    yield response
+
+        return gen()
+
+
+def _http_options():
+    return types.HttpOptions(timeout=LLM_REQUEST_TIMEOUT * 1000)
+
+
+def load_llm(model=LLM_MODEL):
+    # One client per model in the process: its HTTP connections are kept alive between calls,
+    # and building one also fetches the model's metadata
+    if model not in _llms:
+        with _lock:
+            if model not in _llms:
+                _llms[model] = LimitedGoogleGenAI(model=model, http_options=_http_options())
+
+    return _llms[model]
+
+
+def load_genai_client():
+    # Plain google-genai client for direct calls, such as the backend's chat titles. Callers
+    # take a slot with llm_limiter.slot()
+    global _genai_client
+
+    if _genai_client is None:
+        with _lock:
+            if _genai_client is None:
+                _genai_client = genai.Client(http_options=_http_options())
+
+    return _genai_client
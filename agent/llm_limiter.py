@@ -0,0 +1,72 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from .config import LLM_MAX_CONCURRENCY, LLM_QUEUE_TIMEOUT
+
+
+class LLMQueueTimeout(Exception):
+    pass
+
+
+# Bounds the LLM calls one process has in flight. Callers over the limit wait in line for up to
+# queue_timeout seconds and then fail, instead of joining a burst that ends in quota errors and
+# retries. All LLM calls run on the process's agent loop, which the semaphore binds to. Kept
+# apart from the clients in llm.py, so the backend can import it without loading them.
+class LLMLimiter:
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, queue_timeout=LLM_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._queued = 0
+        self._max_queued = 0
+        self._calls = 0
+        self._queue_timeouts = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        started_at = time.perf_counter()
+        self._queued += 1
+        self._max_queued = max(self._max_queued, self._queued)
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._queue_timeouts += 1
+            raise LLMQueueTimeout(
+                f"No LLM slot freed up within {self.queue_timeout}s "
+                f"({self.max_concurrency} calls in flight)"
+            )
+        finally:
+            self._queued -= 1
+
+        waited = time.perf_counter() - started_at
+        self._calls += 1
+        self._wait_seconds += waited
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        self._in_flight += 1
+
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "max_queue_depth": self._max_queued,
+            "calls": self._calls,
+            "queue_timeouts": self._queue_timeouts,
+            "average_wait_seconds": round(self._wait_seconds / self._calls, 3)
+            if self._calls else 0.0,
+            "max_wait_seconds": round(self._max_wait_seconds, 3),
+        }
+
+
+llm_limiter = LLMLimiter()
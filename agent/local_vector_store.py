@@ -0,0 +1,365 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import numpy as np
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+from pydantic import PrivateAttr
+
+
+CURRENT_VERSION_FILE = "CURRENT"
+CENTROIDS_FILE = "centroids.npy"
+OFFSETS_FILE = "offsets.npy"
+VECTORS_FILE = "vectors.npy"
+NODES_FILE = "nodes.sqlite3"
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 256
+ASSIGNMENT_BATCH_SIZE = 8192
+
+FILTER_OPERATORS = {
+    FilterOperator.EQ: "=",
+    FilterOperator.NE: "!=",
+    FilterOperator.GT: ">",
+    FilterOperator.GTE: ">=",
+    FilterOperator.LT: "<",
+    FilterOperator.LTE: "<=",
+    FilterOperator.IN: "IN",
+    FilterOperator.NIN: "NOT IN",
+}
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _kmeans(vectors, n_lists, seed=0):
+    # Spherical k-means on a sample, the vectors are unit length so similarity is a dot product
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+
+        for list_id in range(n_lists):
+            members = sample[assignments == list_id]
+            if len(members):
+                centroids[list_id] = members.mean(axis=0)
+
+        centroids = _normalize(centroids)
+
+    return centroids.astype(np.float32)
+
+
+def filter_sql(filters):
+    # Node payloads are flat metadata dicts, so SQLite's json_extract can filter on them directly
+    clauses, parameters = [], []
+
+    for metadata_filter in filters.filters:
+        if isinstance(metadata_filter, MetadataFilters):
+            clause, clause_parameters = filter_sql(metadata_filter)
+        elif metadata_filter.operator in FILTER_OPERATORS:
+            operator = FILTER_OPERATORS[metadata_filter.operator]
+            values = metadata_filter.value if operator.endswith("IN") else [metadata_filter.value]
+            placeholders = f"({', '.join('?' * len(values))})" if operator.endswith("IN") else "?"
+            clause = f"json_extract(node, ?) {operator} {placeholders}"
+            clause_parameters = [f'$."{metadata_filter.key}"', *values]
+        else:
+            raise ValueError(f"Unsupported metadata filter operator: {metadata_filter.operator}")
+
+        clauses.append(f"({clause})")
+        parameters += clause_parameters
+
+    if filters.condition == FilterCondition.NOT:
+        return f"NOT ({' AND '.join(clauses)})", parameters
+
+    joiner = " OR " if filters.condition == FilterCondition.OR else " AND "
+    return joiner.join(clauses), parameters
+
+
+def _node_sql(filters=None, doc_ids=None, node_ids=None):
+    clauses, parameters = [], []
+
+    if filters and filters.filters:
+        clause, parameters = filter_sql(filters)
+        clauses.append(f"({clause})")
+
+    for column, values in (("ref_doc_id", doc_ids), ("node_id", node_ids)):
+        if values is not None:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            parameters = [*parameters, *values]
+
+    return " AND ".join(clauses), parameters
+
+
+def _assign(vectors, centroids):
+    return np.concatenate([
+        np.argmax(vectors[start:start + ASSIGNMENT_BATCH_SIZE] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), ASSIGNMENT_BATCH_SIZE)
+    ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+
+# IVF index persisted to disk and memory-mapped, so server workers share one copy. Vectors are
+# grouped by inverted list in one .npy file and node payloads live in SQLite. Added and deleted
+# nodes are staged in memory and applied by persist(), which writes a new index version that
+# readers switch to on their next query.
+class LocalVectorStore(BasePydanticVectorStore):
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    persist_dir: str
+    nprobe: int = 16
+    n_lists: int = 0
+
+    _lock = PrivateAttr()
+    _version = PrivateAttr()
+    _centroids = PrivateAttr()
+    _offsets = PrivateAttr()
+    _vectors = PrivateAttr()
+    _pending = PrivateAttr()
+    _deleted_node_ids = PrivateAttr()
+    _deleted_ref_doc_ids = PrivateAttr()
+
+    def __init__(self, persist_dir, nprobe=16, n_lists=0):
+        super().__init__(persist_dir=persist_dir, nprobe=nprobe, n_lists=n_lists)
+        self._lock = threading.Lock()
+        self._version = None
+        self._centroids = None
+        self._offsets = None
+        self._vectors = None
+        self._pending = {}
+        self._deleted_node_ids = set()
+        self._deleted_ref_doc_ids = set()
+
+    @classmethod
+    def class_name(cls):
+        return "LocalVectorStore"
+
+    @property
+    def client(self):
+        return None
+
+    def _current_version(self):
+        try:
+            with open(os.path.join(self.persist_dir, CURRENT_VERSION_FILE), "r") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _version_dir(self, version=None):
+        return os.path.join(self.persist_dir, version or self._version)
+
+    def _load(self):
+        version = self._current_version()
+
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version is None:
+                self._centroids = self._offsets = self._vectors = None
+            else:
+                version_dir = self._version_dir(version)
+                self._centroids = np.load(os.path.join(version_dir, CENTROIDS_FILE))
+                self._offsets = np.load(os.path.join(version_dir, OFFSETS_FILE))
+                self._vectors = np.load(os.path.join(version_dir, VECTORS_FILE), mmap_mode="r")
+
+            self._version = version
+
+    def _fetch_nodes(self, sql, parameters=()):
+        nodes_path = os.path.join(self._version_dir(), NODES_FILE)
+
+        with closing(sqlite3.connect(f"file:{nodes_path}?mode=ro", uri=True)) as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    def add(self, nodes, **add_kwargs):
+        for node in nodes:
+            metadata = node_to_metadata_dict(node, remove_text=False, flat_metadata=False)
+            self._pending[node.node_id] = (
+                np.asarray(node.get_embedding(), dtype=np.float32),
+                node.ref_doc_id,
+                json.dumps(metadata),
+            )
+
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id, **delete_kwargs):
+        self._deleted_ref_doc_ids.add(ref_doc_id)
+        self._pending = {node_id: pending for node_id, pending in self._pending.items()
+                         if pending[1] != ref_doc_id}
+
+    def delete_nodes(self, node_ids=None, filters=None, **delete_kwargs):
+        if filters and filters.filters:
+            where, parameters = _node_sql(filters, node_ids=node_ids)
+            node_ids = self._matching_node_ids(where, parameters)
+
+        self._deleted_node_ids.update(node_ids or [])
+        for node_id in node_ids or []:
+            self._pending.pop(node_id, None)
+
+    def _matching_node_ids(self, where, parameters):
+        # Staged nodes are matched with the same SQL as the persisted ones, in a scratch table
+        self._load()
+        node_ids = set()
+
+        if self._version is not None:
+            node_ids.update(node_id for node_id, in self._fetch_nodes(
+                f"SELECT node_id FROM nodes WHERE {where}", parameters
+            ))
+
+        with closing(sqlite3.connect(":memory:")) as connection:
+            connection.execute("CREATE TABLE nodes (node_id TEXT, ref_doc_id TEXT, node TEXT)")
+            connection.executemany("INSERT INTO nodes VALUES (?, ?, ?)", (
+                (node_id, ref_doc_id, node)
+                for node_id, (_, ref_doc_id, node) in self._pending.items()
+            ))
+            node_ids.update(node_id for node_id, in connection.execute(
+                f"SELECT node_id FROM nodes WHERE {where}", parameters
+            ))
+
+        return node_ids
+
+    def _existing_rows(self):
+        self._load()
+
+        if self._version is None:
+            return
+
+        for row, node_id, ref_doc_id, node in self._fetch_nodes(
+            "SELECT row, node_id, ref_doc_id, node FROM nodes ORDER BY row"
+        ):
+            if (node_id in self._pending or node_id in self._deleted_node_ids
+                    or ref_doc_id in self._deleted_ref_doc_ids):
+                continue
+            yield np.asarray(self._vectors[row]), node_id, ref_doc_id, node
+
+    def persist(self, persist_path=None, fs=None):
+        rows = list(self._existing_rows()) + [
+            (vector, node_id, ref_doc_id, node)
+            for node_id, (vector, ref_doc_id, node) in self._pending.items()
+        ]
+
+        if not rows and self._version is None:
+            return
+
+        vectors = _normalize(np.stack([row[0] for row in rows]).astype(np.float32)) if rows \
+            else np.empty((0, 0), dtype=np.float32)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(rows))))
+        n_lists = max(1, min(n_lists, len(rows)))
+        centroids = _kmeans(vectors, n_lists) if len(rows) else vectors
+        assignments = _assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+
+        version = f"v{time.time_ns()}"
+        version_dir = self._version_dir(version)
+        os.makedirs(version_dir)
+
+        np.save(os.path.join(version_dir, CENTROIDS_FILE), centroids)
+        np.save(os.path.join(version_dir, OFFSETS_FILE), offsets)
+        np.save(os.path.join(version_dir, VECTORS_FILE), vectors[order])
+
+        with closing(sqlite3.connect(os.path.join(version_dir, NODES_FILE))) as connection:
+            connection.execute(
+                "CREATE TABLE nodes "
+                "(row INTEGER PRIMARY KEY, node_id TEXT UNIQUE, ref_doc_id TEXT, node TEXT)"
+            )
+            connection.executemany(
+                "INSERT INTO nodes VALUES (?, ?, ?, ?)",
+                ((new_row, *rows[old_row][1:]) for new_row, old_row in enumerate(order.tolist())),
+            )
+            connection.commit()
+
+        self._switch_version(version)
+
+    def _switch_version(self, version):
+        previous_version = self._current_version()
+
+        current_path = os.path.join(self.persist_dir, CURRENT_VERSION_FILE)
+        with open(f"{current_path}.tmp", "w") as f:
+            f.write(version)
+        os.replace(f"{current_path}.tmp", current_path)
+
+        # Keep the previous version around for workers that are still mid-query on it
+        for name in os.listdir(self.persist_dir):
+            if name.startswith("v") and name not in (version, previous_version):
+                shutil.rmtree(os.path.join(self.persist_dir, name), ignore_errors=True)
+
+        self._pending = {}
+        self._deleted_node_ids = set()
+        self._deleted_ref_doc_ids = set()
+        self._load()
+
+    def query(self, query, **kwargs):
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"Unsupported query mode for LocalVectorStore: {query.mode}")
+
+        self._load()
+
+        if self._version is None or not len(self._vectors):
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        embedding = _normalize(np.asarray(query.query_embedding, dtype=np.float32))
+
+        if (query.filters and query.filters.filters) or query.doc_ids or query.node_ids:
+            where, parameters = _node_sql(query.filters, query.doc_ids, query.node_ids)
+            candidate_rows, similarities = self._filtered_candidates(where, parameters, embedding)
+        else:
+            candidate_rows, similarities = self._probed_candidates(embedding)
+
+        top = np.argsort(similarities)[::-1][:query.similarity_top_k]
+        rows = candidate_rows[top].tolist()
+
+        if not rows:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        payloads = dict(self._fetch_nodes(
+            f"SELECT row, node FROM nodes WHERE row IN ({', '.join('?' * len(rows))})", rows
+        ))
+
+        nodes = [metadata_dict_to_node(json.loads(payloads[row])) for row in rows]
+
+        return VectorStoreQueryResult(
+            nodes=nodes,
+            similarities=similarities[top].tolist(),
+            ids=[node.node_id for node in nodes],
+        )
+
+    def _probed_candidates(self, embedding):
+        nprobe = min(self.nprobe, len(self._centroids))
+        lists = np.argsort(self._centroids @ embedding)[::-1][:nprobe]
+
+        candidate_rows = np.concatenate([
+            np.arange(self._offsets[list_id], self._offsets[list_id + 1]) for list_id in lists
+        ])
+        similarities = np.concatenate([
+            self._vectors[self._offsets[list_id]:self._offsets[list_id + 1]] @ embedding
+            for list_id in lists
+        ])
+
+        return candidate_rows, similarities
+
+    def _filtered_candidates(self, where, parameters, embedding):
+        # A filtered slice (one course, one cohort) is small, so it is scanned exactly rather
+        # than through the inverted lists, which would miss matches outside the probed lists
+        rows = self._fetch_nodes(f"SELECT row FROM nodes WHERE {where} ORDER BY row", parameters)
+        candidate_rows = np.array([row for row, in rows], dtype=np.int64)
+
+        similarities = self._vectors[candidate_rows] @ embedding if len(candidate_rows) \
+            else np.empty(0, dtype=np.float32)
+        return candidate_rows, similarities
@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+import numpy as np
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.utils import get_tokenizer
+
+from .config import CONTEXT_TOKEN_BUDGET, MAX_CHUNKS_PER_PROJECT, MMR_LAMBDA
+
+
+def project_key(node):
+    return node.metadata.get("file_name") or node.ref_doc_id or node.node_id
+
+
+class ProjectDiversityPostprocessor(BaseNodePostprocessor):
+    max_chunks_per_project: int = MAX_CHUNKS_PER_PROJECT
+    mmr_lambda: float = MMR_LAMBDA
+    token_budget: int = CONTEXT_TOKEN_BUDGET
+
+    @classmethod
+    def class_name(cls):
+        return "ProjectDiversityPostprocessor"
+
+    def _postprocess_nodes(self, nodes, query_bundle=None):
+        return self._select_mmr(self._collapse_projects(nodes))
+
+    def _collapse_projects(self, nodes):
+        chunks_per_project = defaultdict(int)
+        collapsed = []
+
+        for node in sorted(nodes, key=lambda node: node.score or 0.0, reverse=True):
+            key = project_key(node.node)
+            if chunks_per_project[key] < self.max_chunks_per_project:
+                chunks_per_project[key] += 1
+                collapsed.append(node)
+
+        return collapsed
+
+    def _select_mmr(self, nodes):
+        if not nodes:
+            return nodes
+
+        tokenizer = get_tokenizer()
+        token_counts = [len(tokenizer(node.node.get_content())) for node in nodes]
+        relevance = self._scaled_scores(nodes)
+        similarity = self._similarity_matrix(nodes)
+
+        selected = []
+        redundancy = np.zeros(len(nodes))
+        remaining = set(range(len(nodes)))
+        tokens_left = self.token_budget
+
+        while remaining:
+            best = max(
+                remaining,
+                key=lambda i: self.mmr_lambda * relevance[i] - (1 - self.mmr_lambda) * redundancy[i]
+            )
+            remaining.discard(best)
+
+            # Always keep the top chunk, then skip whatever no longer fits in the budget
+            if selected and token_counts[best] > tokens_left:
+                continue
+
+            selected.append(best)
+            tokens_left -= token_counts[best]
+            redundancy = np.maximum(redundancy, similarity[best])
+
+        return [nodes[i] for i in selected]
+
+    def _scaled_scores(self, nodes):
+        scores = np.array([node.score or 0.0 for node in nodes])
+        spread = scores.max() - scores.min()
+        return (scores - scores.min()) / spread if spread else np.ones(len(nodes))
+
+    def _similarity_matrix(self, nodes):
+        embeddings = [node.node.embedding for node in nodes]
+
+        if all(embeddings):
+            vectors = np.array(embeddings)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            return vectors @ vectors.T
+
+        # Most vector stores don't return embeddings with query results, compare wording instead
+        word_sets = [set(node.node.get_content().lower().split()) for node in nodes]
+        return np.array([
+            [len(a & b) / len(a | b) if a | b else 0.0 for b in word_sets]
+            for a in word_sets
+        ])
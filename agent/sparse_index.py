@@ -0,0 +1,179 @@
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import closing
+
+from llama_index.core.schema import MetadataMode
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+
+from .config import SPARSE_INDEX_FILE
+from .local_vector_store import filter_sql
+
+
+_sparse_index = None
+_lock = threading.Lock()
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+[+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have how i if in into is it its of on or our so "
+    "that the their then there these this to was we were what when which will with you your"
+    .split()
+)
+
+
+def tokenize(text):
+    # Short tool names ("dbt", "dlt") are kept, "c++" and "c#" don't collapse into "c"
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS and len(token) > 1
+    ]
+
+
+# BM25 keyword index over the same chunks as the vector index, kept in one SQLite file. Chunks
+# are staged by add()/delete_nodes() and written in one transaction by persist(), so readers
+# never see half an update. Only the rows are staged, not the nodes, which carry embeddings.
+class SparseIndex:
+    def __init__(self, path):
+        self.path = path
+        self._pending = {}
+        self._deleted_node_ids = set()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def add(self, nodes):
+        for node in nodes:
+            term_counts = Counter(tokenize(node.get_content(metadata_mode=MetadataMode.EMBED)))
+            metadata = node_to_metadata_dict(node, remove_text=False, flat_metadata=False)
+            self._pending[node.node_id] = (
+                node.ref_doc_id, sum(term_counts.values()), json.dumps(metadata), term_counts,
+            )
+
+        return [node.node_id for node in nodes]
+
+    def ref_doc_ids(self):
+        # READMEs with chunks in the persisted index, to find the ones it is missing
+        if not self.exists():
+            return set()
+
+        with closing(
+            sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=30)
+        ) as connection:
+            try:
+                return {ref_doc_id for ref_doc_id, in connection.execute(
+                    "SELECT DISTINCT ref_doc_id FROM docs"
+                )}
+            except sqlite3.OperationalError:
+                # Written before documents were tracked, it gets rebuilt like an empty one
+                return set()
+
+    def delete_nodes(self, node_ids):
+        self._deleted_node_ids.update(node_ids)
+        for node_id in node_ids:
+            self._pending.pop(node_id, None)
+
+    def persist(self):
+        if not self._pending and not self._deleted_node_ids:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        with closing(sqlite3.connect(self.path, timeout=30)) as connection, connection:
+            columns = {column[1] for column in connection.execute("PRAGMA table_info(docs)")}
+            if columns and "ref_doc_id" not in columns:
+                connection.execute("DROP TABLE docs")
+                connection.execute("DROP TABLE IF EXISTS postings")
+
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS docs "
+                "(node_id TEXT PRIMARY KEY, ref_doc_id TEXT, length INTEGER, node TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS postings (term TEXT, node_id TEXT, tf INTEGER)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS postings_term ON postings (term)")
+            connection.execute("CREATE INDEX IF NOT EXISTS postings_node ON postings (node_id)")
+
+            replaced_node_ids = [
+                (node_id,) for node_id in self._deleted_node_ids | set(self._pending)
+            ]
+            connection.executemany("DELETE FROM postings WHERE node_id = ?", replaced_node_ids)
+            connection.executemany("DELETE FROM docs WHERE node_id = ?", replaced_node_ids)
+
+            for node_id, (ref_doc_id, length, node, term_counts) in self._pending.items():
+                connection.execute(
+                    "INSERT INTO docs VALUES (?, ?, ?, ?)", (node_id, ref_doc_id, length, node)
+                )
+                connection.executemany(
+                    "INSERT INTO postings VALUES (?, ?, ?)",
+                    ((term, node_id, tf) for term, tf in term_counts.items()),
+                )
+
+        self._pending = {}
+        self._deleted_node_ids = set()
+
+    def query(self, query_str, top_k, filters=None):
+        # Returns [(node, score)] for the top_k chunks by BM25, best first
+        terms = sorted(set(tokenize(query_str)))
+        if not terms or not self.exists():
+            return []
+
+        term_placeholders = ", ".join("?" * len(terms))
+        where, filter_parameters = filter_sql(filters) if filters and filters.filters \
+            else ("1", [])
+
+        with closing(
+            sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=30)
+        ) as connection:
+            document_count, average_length = connection.execute(
+                "SELECT COUNT(*), AVG(length) FROM docs"
+            ).fetchone()
+            document_frequencies = dict(connection.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({term_placeholders}) "
+                "GROUP BY term",
+                terms,
+            ).fetchall())
+            postings = connection.execute(
+                "SELECT postings.node_id, term, tf, length FROM postings "
+                "JOIN docs ON docs.node_id = postings.node_id "
+                f"WHERE term IN ({term_placeholders}) AND ({where})",
+                [*terms, *filter_parameters],
+            ).fetchall()
+
+            scores = Counter()
+            for node_id, term, tf, length in postings:
+                df = document_frequencies[term]
+                idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1))
+                scores[node_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            if not top:
+                return []
+
+            payloads = dict(connection.execute(
+                f"SELECT node_id, node FROM docs WHERE node_id IN ({', '.join('?' * len(top))})",
+                [node_id for node_id, _ in top],
+            ).fetchall())
+
+        return [(metadata_dict_to_node(json.loads(payloads[node_id])), score)
+                for node_id, score in top]
+
+
+def load_sparse_index():
+    global _sparse_index
+
+    if _sparse_index is None:
+        with _lock:
+            if _sparse_index is None:
+                _sparse_index = SparseIndex(SPARSE_INDEX_FILE)
+
+    return _sparse_index
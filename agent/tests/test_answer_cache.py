@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agent.answer_cache import (
+    FileAnswerCacheBackend,
+    MemoryAnswerCacheBackend,
+    SemanticAnswerCache,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class SemanticAnswerCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("agent.answer_cache.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_cache(self, backend=None, **kwargs):
+        kwargs = {"similarity_threshold": 0.9, "ttl_seconds": 60, "max_entries": 10, **kwargs}
+        return SemanticAnswerCache(backend or MemoryAnswerCacheBackend(), **kwargs)
+
+    def test_returns_answer_of_similar_query(self):
+        cache = self.make_cache()
+        cache.store("dbt projects", [1.0, 0.0], "Try dbt", 4.0)
+
+        self.assertEqual(cache.lookup([2.0, 0.1]), "Try dbt")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["saved_seconds"], 4.0)
+
+    def test_misses_below_similarity_threshold(self):
+        cache = self.make_cache()
+        cache.store("dbt projects", [1.0, 0.0], "Try dbt", 4.0)
+
+        # cos(45°) ≈ 0.71
+        self.assertIsNone(cache.lookup([1.0, 1.0]))
+        self.assertIsNone(self.make_cache().lookup([1.0, 0.0]))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_picks_the_most_similar_entry(self):
+        cache = self.make_cache(similarity_threshold=0.5)
+        cache.store("dbt", [1.0, 0.0], "dbt answer", 1.0)
+        cache.store("spark", [0.0, 1.0], "spark answer", 1.0)
+
+        self.assertEqual(cache.lookup([0.2, 1.0]), "spark answer")
+
+    def test_expires_entries_after_ttl(self):
+        cache = self.make_cache()
+        cache.store("dbt projects", [1.0, 0.0], "Try dbt", 4.0)
+
+        self.clock.now += 59
+        self.assertEqual(cache.lookup([1.0, 0.0]), "Try dbt")
+
+        # Expiry counts from creation, using an entry does not extend it
+        self.clock.now += 2
+        self.assertIsNone(cache.lookup([1.0, 0.0]))
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = self.make_cache(max_entries=2)
+        cache.store("first", [1.0, 0.0, 0.0], "first answer", 1.0)
+        cache.store("second", [0.0, 1.0, 0.0], "second answer", 1.0)
+
+        self.assertEqual(cache.lookup([1.0, 0.0, 0.0]), "first answer")
+        cache.store("third", [0.0, 0.0, 1.0], "third answer", 1.0)
+
+        self.assertEqual(cache.lookup([1.0, 0.0, 0.0]), "first answer")
+        self.assertIsNone(cache.lookup([0.0, 1.0, 0.0]))
+        self.assertEqual(cache.lookup([0.0, 0.0, 1.0]), "third answer")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_file_backend_keeps_entries_and_recency(self):
+        path = os.path.join(tempfile.mkdtemp(), "answer_cache.json")
+        cache = self.make_cache(FileAnswerCacheBackend(path), max_entries=2)
+        cache.store("first", [1.0, 0.0, 0.0], "first answer", 1.0)
+        self.clock.now += 1
+        cache.store("second", [0.0, 1.0, 0.0], "second answer", 1.0)
+        self.clock.now += 1
+        cache.lookup([1.0, 0.0, 0.0])
+
+        reloaded = self.make_cache(FileAnswerCacheBackend(path), max_entries=2)
+        reloaded.store("third", [0.0, 0.0, 1.0], "third answer", 1.0)
+
+        self.assertEqual(reloaded.lookup([1.0, 0.0, 0.0]), "first answer")
+        self.assertIsNone(reloaded.lookup([0.0, 1.0, 0.0]))
+        self.assertEqual(len(FileAnswerCacheBackend(path).load()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import unittest
+import uuid
+from unittest import mock
+
+from llama_index.core.llms import ChatMessage
+from sqlalchemy import text
+
+from agent import chat_store
+
+
+# Runs the page query against a real Postgres, e.g. TEST_POSTGRES_URI=postgresql://localhost/test
+TEST_POSTGRES_URI = os.environ.get("TEST_POSTGRES_URI")
+
+
+@unittest.skipUnless(TEST_POSTGRES_URI, "TEST_POSTGRES_URI is not set")
+class MessagePageTest(unittest.TestCase):
+    def setUp(self):
+        self.table_name = f"chatstore_test_{uuid.uuid4().hex[:8]}"
+        patcher = mock.patch.multiple(
+            chat_store,
+            POSTGRES_CHAT_STORE_URI=TEST_POSTGRES_URI,
+            CHAT_STORE_TABLE_NAME=self.table_name,
+            _chat_store=None,
+            _engine=None,
+            _async_engine=None,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.drop_table)
+
+        chat_store.load_chat_store().set_messages("chat", [
+            ChatMessage(role="user", content="Any dbt projects?"),
+            ChatMessage(role="assistant", content=None, additional_kwargs={"tool_calls": [{}]}),
+            ChatMessage(role="tool", content="dbt project list"),
+            ChatMessage(role="assistant", content="   "),
+            ChatMessage(role="assistant", content="Try the dbt one"),
+            ChatMessage(role="user", content="And Spark?"),
+            ChatMessage(role="assistant", content="Try the Spark one"),
+        ])
+
+    def drop_table(self):
+        table = chat_store.load_chat_store()._table_class.__table__
+        with chat_store.load_engine().begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {table.fullname}"))
+
+        chat_store.load_engine().dispose()
+        asyncio.run(chat_store._async_engine.dispose())
+
+    def page(self, limit, before=None):
+        messages, next_cursor = chat_store.get_message_page("chat", limit, before)
+        return [(position, message.content) for position, message in messages], next_cursor
+
+    def test_pages_skip_messages_without_text(self):
+        self.assertEqual(self.page(3), (
+            [(5, "Try the dbt one"), (6, "And Spark?"), (7, "Try the Spark one")], 5,
+        ))
+        self.assertEqual(self.page(3, before=5), ([(1, "Any dbt projects?")], None))
+
+    def test_full_page_has_a_cursor_only_when_more_remain(self):
+        self.assertEqual(self.page(4)[1], None)
+        self.assertEqual(len(self.page(4)[0]), 4)
+
+    def test_async_page_matches_sync_page(self):
+        messages, next_cursor = asyncio.run(chat_store.aget_message_page("chat", 2))
+
+        self.assertEqual([position for position, _ in messages], [6, 7])
+        self.assertEqual(next_cursor, 6)
+
+    def test_reports_health_and_pools(self):
+        self.assertTrue(chat_store.chat_store_healthy())
+        self.assertEqual(chat_store.pool_status()["sync"]["checked_out"], 0)
+
+    def test_unknown_chat_is_empty(self):
+        self.assertEqual(chat_store.get_message_page("other", 10), ([], None))
+
+
+if __name__ == "__main__":
+    unittest.main()
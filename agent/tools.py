@@ -1,19 +1,147 @@
-from llama_index.core.tools import QueryEngineTool
-from llama_index.llms.google_genai import GoogleGenAI
+import json
+import re
+from functools import lru_cache
 
-from .config import LLM_MODEL, SIMILARITY_TOP_K
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.tools import FunctionTool
+from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters
+
+from .config import (
+    DIVERSIFY_RETRIEVAL,
+    HYBRID_RETRIEVAL,
+    HYBRID_TOP_K,
+    SIMILARITY_TOP_K,
+    SNIPPET_MAX_CHARACTERS,
+    TOOL_MODE,
+)
+from .hybrid_retriever import HybridRetriever, SparseRetriever
+from .llm import load_llm
+from .postprocessors import ProjectDiversityPostprocessor
+from .sparse_index import load_sparse_index
+
+
+TOOL_NAME = "Projects_Data_Query_Tool"
+TOOL_DESCRIPTION = (
+    "Fetches past student projects from DataTalkClub Zoomcamp cohorts "
+    "(Data Engineering, ML Engineering, MLOps, etc.) to provide examples"
+    " and inspiration."
+)
+FILTERS_DESCRIPTION = (
+    "Optionally narrow the search to one course (a slug such as 'data-engineering-zoomcamp', "
+    "'machine-learning-zoomcamp', 'mlops-zoomcamp' or 'llm-zoomcamp') and/or one cohort year "
+    "(e.g. '2024'); leave them empty to search every project."
+)
+
+
+def node_postprocessors():
+    return [ProjectDiversityPostprocessor()] if DIVERSIFY_RETRIEVAL else []
+
+
+def metadata_slug(value):
+    # Same normalization the embedder applies to the stored course names
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-")
+
+
+def metadata_filters(course="", cohort=""):
+    filters = []
+    if metadata_slug(course):
+        filters.append(MetadataFilter(key="course", value=metadata_slug(course)))
+    if str(cohort).strip():
+        filters.append(MetadataFilter(key="cohort", value=str(cohort).strip()))
+
+    return MetadataFilters(filters=filters) if filters else None
+
+
+def projects_retriever(vector_index, filters=None):
+    dense_retriever = vector_index.as_retriever(similarity_top_k=SIMILARITY_TOP_K, filters=filters)
+
+    if not HYBRID_RETRIEVAL:
+        return dense_retriever
+
+    return HybridRetriever(
+        dense_retriever,
+        SparseRetriever(load_sparse_index(), SIMILARITY_TOP_K, filters),
+        similarity_top_k=HYBRID_TOP_K,
+    )
 
 
 def query_engine_tool(vector_index):
-    llm = GoogleGenAI(model=LLM_MODEL)
-    query_engine = vector_index.as_query_engine(similarity_top_k=SIMILARITY_TOP_K, llm=llm)
+    llm = load_llm()
 
-    return QueryEngineTool.from_defaults(
-        query_engine=query_engine,
-        name="Projects_Data_Query_Tool",
-        description=(
-            "Fetches past student projects from DataTalkClub Zoomcamp cohorts "
-            "(Data Engineering, ML Engineering, MLOps, etc.) to provide examples"
-            " and inspiration."
+    @lru_cache(maxsize=32)
+    def query_engine(course, cohort):
+        return RetrieverQueryEngine.from_args(
+            projects_retriever(vector_index, metadata_filters(course, cohort)),
+            llm=llm,
+            node_postprocessors=node_postprocessors(),
         )
+
+    async def query_projects(query: str, course: str = "", cohort: str = "") -> str:
+        course, cohort = metadata_slug(course), str(cohort).strip()
+        response = await query_engine(course, cohort).aquery(query)
+
+        # A filter that matches nothing (e.g. a misspelled course) falls back to every project
+        if not response.source_nodes and (course or cohort):
+            response = await query_engine("", "").aquery(query)
+
+        return str(response)
+
+    return FunctionTool.from_defaults(
+        async_fn=query_projects,
+        name=TOOL_NAME,
+        description=f"{TOOL_DESCRIPTION} {FILTERS_DESCRIPTION}",
     )
+
+
+def project_snippet(node_with_score):
+    text = " ".join(node_with_score.node.get_content().split())
+
+    metadata = node_with_score.node.metadata
+
+    return {
+        "project": metadata.get("file_name", ""),
+        "repo_url": metadata.get("repo_url", ""),
+        "course": metadata.get("course", ""),
+        "cohort": metadata.get("cohort", ""),
+        "score": round(node_with_score.score or 0.0, 3),
+        "text": text[:SNIPPET_MAX_CHARACTERS],
+    }
+
+
+def retriever_tool(vector_index):
+    postprocessors = node_postprocessors()
+
+    def retrieve(query, filters=None):
+        return projects_retriever(vector_index, filters).aretrieve(query)
+
+    async def search_projects(query: str, course: str = "", cohort: str = "") -> str:
+        filters = metadata_filters(course, cohort)
+        nodes = await retrieve(query, filters)
+
+        # A filter that matches nothing (e.g. a misspelled course) falls back to every project
+        if not nodes and filters:
+            nodes = await retrieve(query)
+
+        for postprocessor in postprocessors:
+            nodes = postprocessor.postprocess_nodes(nodes, query_str=query)
+
+        return json.dumps([project_snippet(node) for node in nodes], ensure_ascii=False)
+
+    return FunctionTool.from_defaults(
+        async_fn=search_projects,
+        name=TOOL_NAME,
+        description=(
+            f"{TOOL_DESCRIPTION} {FILTERS_DESCRIPTION} Returns matching README snippets as a "
+            "JSON list of {project, repo_url, course, cohort, score, text}."
+        ),
+    )
+
+
+PROJECT_TOOLS = {
+    "query_engine": query_engine_tool,
+    "retriever": retriever_tool,
+}
+
+
+def projects_tool(vector_index, mode=TOOL_MODE):
+    return PROJECT_TOOLS[mode](vector_index)
@@ -3,18 +3,32 @@ import os
 from llama_index.vector_stores.pinecone import PineconeVectorStore
 from pinecone import Pinecone
 
-from .config import EMBEDDING_DIMENSION, INDEX_NAME, INDEX_SPEC
+from .config import (
+    INDEX_NAME,
+    LOCAL_INDEX_DIR,
+    LOCAL_INDEX_NPROBE,
+    PINECONE_INDEX_HOST,
+    VECTOR_STORE_BACKEND,
+)
+from .local_vector_store import LocalVectorStore
 
 
-def load_vector_store():
+def load_pinecone_vector_store():
+    # The index is created by ingestion, serving only connects to it. With a known host not even
+    # the describe call that looks it up is made
     pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+    return PineconeVectorStore(pc.Index(INDEX_NAME, host=PINECONE_INDEX_HOST))
 
-    if not pc.has_index(INDEX_NAME):
-        pc.create_index(
-            name=INDEX_NAME,
-            dimension=EMBEDDING_DIMENSION,
-            metric="cosine",
-            spec=INDEX_SPEC,
-        )
 
-    return PineconeVectorStore(pc.Index(INDEX_NAME))
+def load_local_vector_store():
+    return LocalVectorStore(persist_dir=LOCAL_INDEX_DIR, nprobe=LOCAL_INDEX_NPROBE)
+
+
+VECTOR_STORE_BACKENDS = {
+    "pinecone": load_pinecone_vector_store,
+    "local": load_local_vector_store,
+}
+
+
+def load_vector_store(backend=VECTOR_STORE_BACKEND):
+    return VECTOR_STORE_BACKENDS[backend]()
@@ -7,10 +7,57 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
+import asyncio
+import logging
 import os
+import time
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+started_at = time.perf_counter()
+django_application = get_asgi_application()
+
+# Needs the app registry loaded. Importing the views is cheap, the assistant is built later
+from chat.constants import AGENT_WARMUP  # noqa: E402
+from chat.utils import adopt_agent_event_loop, startup_timings  # noqa: E402
+from chat.views import warm_up_agent  # noqa: E402
+
+startup_timings["django_setup_seconds"] = round(time.perf_counter() - started_at, 3)
+logging.getLogger(__name__).info(
+    "Django loaded in %.2fs", startup_timings["django_setup_seconds"]
+)
+
+_warm_up_task = None
+
+
+async def lifespan(receive, send):
+    global _warm_up_task
+
+    while True:
+        message = await receive()
+
+        if message["type"] == "lifespan.startup":
+            # Startup completes right away, the assistant is built in the background and
+            # /api/ready/ reports when it is done
+            adopt_agent_event_loop()
+            if AGENT_WARMUP:
+                _warm_up_task = asyncio.create_task(warm_up_agent())
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if _warm_up_task is not None:
+                _warm_up_task.cancel()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    # The first request pins the agent to the server's event loop, so agent calls, chat-store
+    # I/O and title generation all run on it instead of on a separate thread
+    adopt_agent_event_loop()
+    await django_application(scope, receive, send)
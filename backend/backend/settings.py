@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     "rest_framework",
+    "adrf",
     "corsheaders",
     "djoser",
     "authentication",
@@ -154,6 +155,20 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=20),
 }
 
+# Startup, warm-up and agent errors of our own apps go to the console
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "backend": {"handlers": ["console"], "level": "INFO"},
+        "chat": {"handlers": ["console"], "level": "INFO"},
+        "agent": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -1,27 +1,48 @@
 
-from google import genai
-from llama_index.storage.chat_store.postgres import PostgresChatStore
-from .constants import GEMINI_MODEL,  POSTGRES_CHAT_STORE_URI
-from agent.dtc_assistant import DataTalksClubAssistant
+import asyncio
+import logging
+import threading
+import time
+
+from .constants import GEMINI_MODEL
+from agent.chat_store import aget_message_page
+from agent.llm_limiter import llm_limiter
+
+
+logger = logging.getLogger(__name__)
 
 
 class BaseAIAgent:
     def __init__(self):
         raise NotImplementedError
 
-    def generate_response(self, user_query, chat_id):
+    async def generate_response(self, user_query, chat_id):
+        raise NotImplementedError
+
+    def stream_response(self, user_query, chat_id):
+        raise NotImplementedError
+
+    async def chat_messages(self, chat_id, limit, before=None):
+        raise NotImplementedError
+
+    def metrics(self):
         raise NotImplementedError
 
-    def chat_messages(self, chat_id):
+    def warm_up(self):
+        raise NotImplementedError
+
+    def is_ready(self):
         raise NotImplementedError
 
 
 class GeminiTestingAgent(BaseAIAgent):
     def __init__(self):
-        self.client = genai.Client()
+        from agent.llm import load_genai_client
+
+        self.client = load_genai_client()
         self.messages = []
 
-    def generate_response(self, user_query, chat_id):
+    async def generate_response(self, user_query, chat_id):
         prompt = (
             "You are a helpful AI assistant for a project recommendation system. "
             f"Answer the following query:\n{user_query}\n"
@@ -30,33 +51,92 @@ class GeminiTestingAgent(BaseAIAgent):
 
         self.add_message("user", user_query)
 
-        response = self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=prompt,
-        )
+        async with llm_limiter.slot():
+            response = await self.client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=prompt,
+            )
 
         self.add_message("assistant", response.text)
 
         return response.text
 
-    def chat_messages(self, chat_id):
-        return (
-            self.messages if self.messages
-            else [{"role": "system", "content": "No messages yet."}]
-        )
+    async def chat_messages(self, chat_id, limit, before=None):
+        end = len(self.messages) if before is None else min(before - 1, len(self.messages))
+        start = max(end - limit, 0)
+        messages = [{"id": position + 1, **message}
+                    for position, message in enumerate(self.messages[start:end], start)]
+
+        return messages, (start + 1 if start else None)
+
+    def metrics(self):
+        return {"llm": llm_limiter.stats()}
+
+    def warm_up(self):
+        pass
+
+    def is_ready(self):
+        return True
 
     def add_message(self, role, content):
         self.messages.append({"role": role, "content": content})
 
 
+# The assistant connects to the vector store and the LLM, so it is built on first use (or by
+# warm_up() when the server starts) rather than whenever chat.views is imported
 class DataTalksClubAIAgent(BaseAIAgent):
     def __init__(self):
-        self.assistant = DataTalksClubAssistant()
+        self._assistant = None
+        self._lock = threading.Lock()
+        self.startup_timings = {}
+
+    def warm_up(self):
+        if self._assistant is None:
+            with self._lock:
+                if self._assistant is None:
+                    self._assistant = self.load_assistant()
+
+        return self._assistant
+
+    def load_assistant(self):
+        started_at = time.perf_counter()
+        from agent.dtc_assistant import DataTalksClubAssistant
+        imported_at = time.perf_counter()
+        assistant = DataTalksClubAssistant()
+        loaded_at = time.perf_counter()
+
+        self.startup_timings = {
+            "import_seconds": round(imported_at - started_at, 3),
+            "init_seconds": round(loaded_at - imported_at, 3),
+        }
+        logger.info(
+            "Assistant imported in %.2fs, initialized in %.2fs",
+            imported_at - started_at, loaded_at - imported_at,
+        )
+        return assistant
+
+    def is_ready(self):
+        return self._assistant is not None
+
+    async def assistant(self):
+        # Building blocks on network calls, so it happens on a worker thread and the loop keeps
+        # serving the other conversations meanwhile
+        if self._assistant is None:
+            return await asyncio.to_thread(self.warm_up)
+
+        return self._assistant
+
+    async def generate_response(self, user_query, chat_id):
+        return await (await self.assistant()).run(user_query, str(chat_id))
+
+    async def stream_response(self, user_query, chat_id):
+        async for event in (await self.assistant()).stream(user_query, str(chat_id)):
+            yield event
 
-    def generate_response(self, user_query, chat_id):
-        return self.assistant.run(user_query, str(chat_id))
+    async def chat_messages(self, chat_id, limit, before=None):
+        messages, next_cursor = await aget_message_page(str(chat_id), limit=limit, before=before)
+        return [{"id": position, "role": message.role, "content": message.content}
+                for position, message in messages], next_cursor
 
-    def chat_messages(self, chat_id):
-        chat_store = PostgresChatStore.from_uri(POSTGRES_CHAT_STORE_URI)
-        return [{"role": message.role, "content": message.content}
-                for message in chat_store.get_messages(str(chat_id))]
+    def metrics(self):
+        return self._assistant.metrics() if self._assistant else {"llm": llm_limiter.stats()}
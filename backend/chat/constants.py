@@ -4,4 +4,18 @@ GEMINI_MODEL = "gemma-3-12b-it"
 
 QUERY_PREVIEW_LENGTH = 512
 
-POSTGRES_CHAT_STORE_URI = os.environ.get("POSTGRES_CHAT_STORE_URI") or ""
+STREAM_QUERY_PARAM = "stream"
+
+STREAM_ERROR_DETAIL = "The answer could not be generated, please try again."
+
+PLACEHOLDER_TITLE_WORDS = 8
+
+MESSAGES_PAGE_SIZE = 50
+
+MAX_MESSAGES_PAGE_SIZE = 200
+
+# Build the assistant when a server process starts instead of on its first chat request
+AGENT_WARMUP = os.environ.get("AGENT_WARMUP", "true") == "true"
+# A failed warm-up (e.g. the vector store is unreachable) is retried with exponential backoff
+AGENT_WARMUP_RETRY_SECONDS = 5
+AGENT_WARMUP_MAX_RETRY_SECONDS = 5 * 60
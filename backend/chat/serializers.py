@@ -1,8 +1,10 @@
+from adrf.serializers import ModelSerializer
 from rest_framework import serializers
+from .constants import MAX_MESSAGES_PAGE_SIZE, MESSAGES_PAGE_SIZE
 from .models import Chat
 
 
-class ChatSerializer(serializers.ModelSerializer):
+class ChatSerializer(ModelSerializer):
     title = serializers.CharField(required=False, allow_blank=True)
     description = serializers.CharField(required=False, allow_blank=True)
     user_query = serializers.CharField(write_only=True, required=True, allow_blank=False)
@@ -18,3 +20,14 @@ class ChatSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop("user_query", None)
         return super().create(validated_data)
+
+    async def acreate(self, validated_data):
+        validated_data.pop("user_query", None)
+        return await super().acreate(validated_data)
+
+
+class MessagePageSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_MESSAGES_PAGE_SIZE, default=MESSAGES_PAGE_SIZE
+    )
+    before = serializers.IntegerField(required=False, min_value=1, default=None)
@@ -1,7 +1,7 @@
+from adrf.routers import DefaultRouter
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
 
-from .views import ChatsViewSet
+from .views import ChatsViewSet, MetricsView, ReadinessView
 
 
 router = DefaultRouter()
@@ -10,4 +10,6 @@ router.register("chats", ChatsViewSet, basename="chats")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("ready/", ReadinessView.as_view(), name="ready"),
 ]
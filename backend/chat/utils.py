@@ -1,16 +1,125 @@
-from google import genai
+import asyncio
+import json
+import logging
+import threading
 
-from .constants import GEMINI_MODEL
+from agent.llm_limiter import llm_limiter
 
+from .constants import GEMINI_MODEL, PLACEHOLDER_TITLE_WORDS
+from .models import Chat
 
-def google_ai_response(prompt):
-    return genai.Client().models.generate_content(model=GEMINI_MODEL, contents=prompt).text
 
+logger = logging.getLogger(__name__)
 
-def chat_title(user_query):
+_agent_loop = None
+_agent_loop_lock = threading.Lock()
+_title_tasks = set()
+startup_timings = {}
+
+
+async def google_ai_response(prompt):
+    # The LLM clients are only loaded once needed, not when Django imports the app
+    from agent.llm import load_genai_client
+
+    async with llm_limiter.slot():
+        response = await load_genai_client().aio.models.generate_content(
+            model=GEMINI_MODEL, contents=prompt
+        )
+    return response.text
+
+
+async def chat_title(user_query):
     prompt = (
         f"Generate a concise chat title for the following query: '{user_query}'"
         "Keep the title under 250 characters. Just give me the title without any additional text."
     )
 
-    return google_ai_response(prompt).strip('" \r\n')[:256]
+    return (await google_ai_response(prompt)).strip('" \r\n')[:256]
+
+
+def placeholder_title(user_query):
+    words = user_query.split()
+    title = " ".join(words[:PLACEHOLDER_TITLE_WORDS]).strip(" .,;:!?")
+
+    if len(words) > PLACEHOLDER_TITLE_WORDS:
+        title += "..."
+
+    return (title or "New chat")[:256]
+
+
+async def update_chat_title(chat_id, user_query):
+    await Chat.objects.filter(pk=chat_id).aupdate(title=await chat_title(user_query))
+
+
+def schedule_chat_title(chat_id, user_query):
+    # Runs on the agent loop next to the conversations, the loop only keeps weak references
+    # to tasks so they are held here until done
+    task = asyncio.run_coroutine_threadsafe(
+        update_chat_title(chat_id, user_query), agent_event_loop()
+    )
+    _title_tasks.add(task)
+    task.add_done_callback(lambda done: _title_task_done(chat_id, done))
+    return task
+
+
+def _title_task_done(chat_id, task):
+    # The chat keeps its placeholder title, but the failure is logged
+    _title_tasks.discard(task)
+
+    if task.cancelled():
+        return
+
+    error = task.exception()
+    if error is not None:
+        logger.error("Generating the title of chat %s failed", chat_id, exc_info=error)
+
+
+def server_sent_event(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def adopt_agent_event_loop():
+    # Under ASGI the server's loop is long-lived, so agent calls run on it directly
+    global _agent_loop
+
+    if _agent_loop is None:
+        with _agent_loop_lock:
+            if _agent_loop is None:
+                _agent_loop = asyncio.get_running_loop()
+
+
+def agent_event_loop():
+    # Pooled async connections are bound to the loop that opened them, so every agent call in
+    # this process runs on one long-lived loop instead of a fresh loop per request
+    global _agent_loop
+
+    if _agent_loop is None:
+        with _agent_loop_lock:
+            if _agent_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="agent-loop", daemon=True).start()
+                _agent_loop = loop
+
+    return _agent_loop
+
+
+async def on_agent_loop(coroutine):
+    loop = agent_event_loop()
+
+    if loop is asyncio.get_running_loop():
+        return await coroutine
+
+    # Any other loop (e.g. the per-request one of an async view under WSGI) waits on the agent
+    # loop without blocking a thread
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+
+async def iterate_on_agent_loop(async_iterator):
+    try:
+        while True:
+            try:
+                yield await on_agent_loop(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        await on_agent_loop(async_iterator.aclose())
@@ -1,15 +1,43 @@
-from asgiref.sync import async_to_sync
-from rest_framework.permissions import IsAuthenticated
+import asyncio
+import logging
+
+from adrf.viewsets import ModelViewSet
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.views import APIView
+
+from agent.chat_store import chat_store_healthy
+from agent.llm_limiter import LLMQueueTimeout
 
 from .ai_agent import DataTalksClubAIAgent
-from .constants import QUERY_PREVIEW_LENGTH
+from .constants import (
+    AGENT_WARMUP,
+    AGENT_WARMUP_MAX_RETRY_SECONDS,
+    AGENT_WARMUP_RETRY_SECONDS,
+    QUERY_PREVIEW_LENGTH,
+    STREAM_ERROR_DETAIL,
+    STREAM_QUERY_PARAM,
+)
 from .models import Chat
-from .serializers import ChatSerializer
-from .utils import chat_title
+from .serializers import ChatSerializer, MessagePageSerializer
+from .utils import (
+    iterate_on_agent_loop, on_agent_loop, placeholder_title, schedule_chat_title, server_sent_event,
+    startup_timings,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
+class AssistantBusy(APIException):
+    status_code = 503
+    default_detail = "The assistant is busy, please try again in a moment."
+    default_code = "assistant_busy"
+
+
+# Async end to end: a conversation waiting on the LLM holds no thread, only a task on the loop
 class ChatsViewSet(ModelViewSet):
     serializer_class = ChatSerializer
     permission_classes = [IsAuthenticated]
@@ -18,47 +46,143 @@ class ChatsViewSet(ModelViewSet):
     def get_queryset(self):
         return Chat.objects.filter(user=self.request.user)
 
-    def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
-        ai_answer = async_to_sync(self.ai_agent.generate_response)(
+    async def acreate(self, request, *args, **kwargs):
+        response = await super().acreate(request, *args, **kwargs)
+
+        if self.wants_stream(request):
+            return self.stream_answer(
+                chat=response.data,
+                user_query=request.data.get("user_query", ""),
+                chat_id=response.data["id"],
+            )
+
+        ai_answer = await self.generate_answer(
             user_query=request.data.get("user_query", ""),
-            chat_id=response.data["id"]
+            chat_id=response.data["id"],
         )
 
         return Response({"chat": response.data, "ai_response": ai_answer})
 
-    def perform_create(self, serializer):
+    async def perform_acreate(self, serializer):
         user_query = serializer.validated_data.get("user_query", "")
-        serializer.save(
+        chat = await serializer.asave(
             user=self.request.user,
-            title=chat_title(user_query),
+            title=placeholder_title(user_query),
             query_preview=user_query[:QUERY_PREVIEW_LENGTH],
         )
+        schedule_chat_title(chat.id, user_query)
 
-    def retrieve(self, request, *args, **kwargs):
-        chat = self.get_object()
+    async def aretrieve(self, request, *args, **kwargs):
+        chat = await self.aget_object()
 
-        if chat.user != request.user:
+        if chat.user_id != request.user.id:
             return Response({"detail": "Not found."}, status=404)
 
+        page = MessagePageSerializer(data=request.query_params)
+        page.is_valid(raise_exception=True)
+        messages, next_cursor = await on_agent_loop(
+            self.ai_agent.chat_messages(chat.id, **page.validated_data)
+        )
+
         return Response({
-            "chat": ChatSerializer(chat).data,
-            "messages": self.ai_agent.chat_messages(chat.id),
+            "chat": await ChatSerializer(chat).adata,
+            "messages": messages,
+            "next_cursor": next_cursor,
         })
 
-    def update(self, request, *args, **kwargs):
-        chat = self.get_object()
+    async def aupdate(self, request, *args, **kwargs):
+        chat = await self.aget_object()
 
-        if chat.user != request.user:
+        if chat.user_id != request.user.id:
             return Response({"detail": "Not found."}, status=404)
 
-        response = super().update(request, *args, **kwargs)
-        ai_answer = async_to_sync(self.ai_agent.generate_response)(
+        response = await super().aupdate(request, *args, **kwargs)
+
+        if self.wants_stream(request):
+            return self.stream_answer(
+                chat=response.data,
+                user_query=request.data.get("user_query", ""),
+                chat_id=chat.id,
+            )
+
+        ai_answer = await self.generate_answer(
             user_query=request.data.get("user_query", ""),
             chat_id=chat.id,
         )
 
         return Response({"chat": response.data, "ai_response": ai_answer})
 
-    def perform_update(self, serializer):
-        return serializer.save(message_count=self.get_object().message_count + 2)
+    async def perform_aupdate(self, serializer):
+        return await serializer.asave(message_count=serializer.instance.message_count + 2)
+
+    async def generate_answer(self, user_query, chat_id):
+        # The chat is saved either way, a busy LLM only fails the answer
+        try:
+            return await on_agent_loop(
+                self.ai_agent.generate_response(user_query=user_query, chat_id=chat_id)
+            )
+        except LLMQueueTimeout:
+            raise AssistantBusy()
+
+    def wants_stream(self, request):
+        return request.query_params.get(STREAM_QUERY_PARAM, "").lower() in ("1", "true")
+
+    def stream_answer(self, chat, user_query, chat_id):
+        async def events():
+            yield server_sent_event({"type": "chat", "chat": chat})
+
+            agent_events = self.ai_agent.stream_response(user_query=user_query, chat_id=chat_id)
+            try:
+                async for event in iterate_on_agent_loop(agent_events):
+                    yield server_sent_event(event)
+            except LLMQueueTimeout:
+                yield server_sent_event({"type": "error", "detail": AssistantBusy.default_detail})
+            except Exception:
+                # The response has started, so the client only learns about it from the stream
+                logger.exception("Streaming an answer for chat %s failed", chat_id)
+                yield server_sent_event({"type": "error", "detail": STREAM_ERROR_DETAIL})
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(ChatsViewSet.ai_agent.metrics())
+
+
+class ReadinessView(APIView):
+    # For load balancers and orchestrators: 503 until the assistant is built and the chat store
+    # answers. Without warm-up the first chat builds the assistant, so readiness can't wait for it
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        ai_agent = ChatsViewSet.ai_agent
+        chat_store_ready = chat_store_healthy()
+        ready = (ai_agent.is_ready() or not AGENT_WARMUP) and chat_store_ready
+
+        return Response(
+            {
+                "ready": ready,
+                "chat_store": chat_store_ready,
+                "startup": {**startup_timings, "agent": ai_agent.startup_timings},
+            },
+            status=200 if ready else 503,
+        )
+
+
+async def warm_up_agent():
+    delay = AGENT_WARMUP_RETRY_SECONDS
+
+    while not ChatsViewSet.ai_agent.is_ready():
+        try:
+            await asyncio.to_thread(ChatsViewSet.ai_agent.warm_up)
+        except Exception:
+            logger.exception("Assistant warm-up failed, retrying in %ss", delay)
+            await asyncio.sleep(delay)
+            delay = min(2 * delay, AGENT_WARMUP_MAX_RETRY_SECONDS)
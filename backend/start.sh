@@ -1,2 +1,2 @@
 pip install -r requirements.txt
-python3 manage.py runserver
\ No newline at end of file
+uvicorn backend.asgi:application --reload
\ No newline at end of file
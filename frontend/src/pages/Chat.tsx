@@ -13,7 +13,10 @@ export default function Chat() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [isLoading, setIsLoading] = useState(false);
   const [isPageLoading, setIsPageLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  const keepScrollRef = useRef(false);
   const navigate = useNavigate();
   const location = useLocation();
   const { chatId } = useParams<{ chatId: string }>();
@@ -28,6 +31,7 @@ export default function Chat() {
     const fetchChatMessages = async () => {
       try {
         let loadedMessages = [];
+        let loadedCursor: number | null = null;
 
         if (isNewChat) {
             loadedMessages = [{ id: 0, content: STARTING_AI_MESSAGE, isUser: false }];
@@ -36,14 +40,18 @@ export default function Chat() {
             loadedMessages = location.state.initialMessages;
             console.log("Loaded initial messages from navigation state:", loadedMessages);
           } else {
-            loadedMessages = await chatMessages(Number(chatId));
+            const page = await chatMessages(Number(chatId));
+            loadedMessages = page.messages;
+            loadedCursor = page.nextCursor;
             console.log("Fetched messages from API:", loadedMessages);
           }
         }
         setMessages(loadedMessages);
+        setNextCursor(loadedCursor);
       } catch (error) {
         console.error("Error fetching chat messages:", error);
         setMessages([]);
+        setNextCursor(null);
       }
 
       setIsPageLoading(false);
@@ -51,9 +59,30 @@ export default function Chat() {
     fetchChatMessages();
   }, [chatId, isNewChat, location.state]);
 
+  const loadOlderMessages = async () => {
+    if (nextCursor === null) {
+      return;
+    }
+
+    setIsLoadingOlder(true);
+    try {
+      const page = await chatMessages(Number(chatId), nextCursor);
+      keepScrollRef.current = true;
+      setMessages(previousMessages => [...page.messages, ...previousMessages]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error fetching older chat messages:", error);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
+  // Ids of loaded messages are their positions in the chat, new ones continue after the last
+  const nextMessageId = () => (messages.length ? messages[messages.length - 1].id + 1 : 0);
+
   const handleSendMessage = async (query: string) => {
     const userMessage: Message = {
-      id: messages.length,
+      id: nextMessageId(),
       content: query,
       isUser: true,
     };
@@ -84,7 +113,7 @@ export default function Chat() {
       const response = await continueChat(Number(chatId), query);
       if (response) {
         const ai_message: Message = {
-          id: messages.length,
+          id: userMessage.id + 1,
           content: response,
           isUser: false,
         };
@@ -95,6 +124,11 @@ export default function Chat() {
   };
 
   useEffect(() => {
+    // Older messages are added above, so stay where the user is reading
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -116,6 +150,18 @@ export default function Chat() {
         </div>
 
         <div className="flex-1 overflow-y-auto p-4 space-y-4">
+          {nextCursor !== null && (
+            <div className="flex justify-center">
+              <button
+                onClick={loadOlderMessages}
+                disabled={isLoadingOlder}
+                className="text-sm text-blue-600 hover:text-blue-700 disabled:text-gray-400"
+              >
+                {isLoadingOlder ? 'Loading...' : 'Load older messages'}
+              </button>
+            </div>
+          )}
+
           {messages.map(message => (
             <ChatMessage key={message.id} message={message} />
           ))}
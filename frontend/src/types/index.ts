@@ -4,6 +4,11 @@ export interface Message {
   isUser: boolean;
 }
 
+export interface MessagePage {
+  messages: Message[];
+  nextCursor: number | null;
+}
+
 export interface Chat {
   id: string;
   title: string;
@@ -1,4 +1,4 @@
-import { Message } from "../types";
+import { MessagePage } from "../types";
 import { API_ENDPOINTS } from "./constants";
 import { authHeaders, jsonHeaders } from "./helpers";
 
@@ -109,8 +109,9 @@ const refreshToken = async (refreshToken: string) => {
 }
 
 
-const chatMessages = async (chatId: number) : Promise<Message[]> => {
-    const response = await fetch(`${API_ENDPOINTS.CHATS}${chatId}`, {
+const chatMessages = async (chatId: number, before?: number | null) : Promise<MessagePage> => {
+    const query = before ? `?before=${before}` : "";
+    const response = await fetch(`${API_ENDPOINTS.CHATS}${chatId}${query}`, {
         method: "GET",
         headers: authHeaders(),
     });
@@ -121,27 +122,17 @@ const chatMessages = async (chatId: number) : Promise<Message[]> => {
 
     const messages = [];
     const data = await response.json();
-    const raw_messages = data.messages;
-
-    for (let messageIndex = 0; messageIndex < raw_messages.length; messageIndex++) {
-        const message = raw_messages[messageIndex];
-
-        if (message.role !== "user" && message.role !== "assistant") {
-            continue;
-        }
-
-        if (!message.content || message.content.trim() === "") {
-            continue;
-        }
 
+    // The API only returns user and assistant messages with content, oldest first
+    for (const message of data.messages) {
         messages.push({
-            id: messageIndex,
+            id: message.id,
             content: message.content,
             isUser: message.role === "user",
         });
     }
 
-    return messages;
+    return { messages, nextCursor: data.next_cursor };
 };
 
 
@@ -14,3 +14,22 @@ def repo_name(repo_url):
 def raw_readme_url(repo_url):
     owner_name, repository_name = repo_user(repo_url), repo_name(repo_url)
     return f"https://raw.githubusercontent.com/{owner_name}/{repository_name}/main/README.md"
+
+
+def repo_slug(url):
+    return f"{repo_user(url)}/{repo_name(url)}"
+
+
+def normalize_repo_url(url):
+    # Reduces links like http://www.github.com/Owner/repo.git or .../repo/tree/main/docs to
+    # https://github.com/Owner/repo, anything that isn't a GitHub repository gives None
+    parsed_url = urlparse(url.strip())
+    if parsed_url.netloc.lower().removeprefix("www.") != "github.com":
+        return None
+
+    path_parts = [part for part in parsed_url.path.split("/") if part]
+    if len(path_parts) < 2:
+        return None
+
+    owner_name, repository_name = path_parts[0], path_parts[1].removesuffix(".git")
+    return f"https://github.com/{owner_name}/{repository_name}"
@@ -3,17 +3,403 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import json
+import logging
+import os
+import time
+from email.utils import parsedate_to_datetime
+
+from scrapy import Request, signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+
+from readme_downloader.helpers import repo_slug
+
+
+logger = logging.getLogger(__name__)
+
 
 class BranchFallbackMiddleware:
+    # Last resort for READMEs that ReadmeResolutionMiddleware couldn't resolve
     def process_response(self, request, response, spider):
-        if not request.url.endswith("/README.md"):
+        if not request.url.endswith("/README.md") or request.meta.get("readme_resolved"):
             return response
 
         if not response.status == 404:
             return response
 
+        spider.crawler.stats.inc_value("readme/wasted_requests")
+
         if "main" in response.url:
             fallback_url = request.url.replace("/main/", "/master/")
             return request.replace(url=fallback_url)
 
+        spider.crawler.stats.inc_value("readme/missing")
+        return response
+
+
+class ReadmeResolutionMiddleware:
+    # Looks up each repository's actual README (default branch and file name) once through the
+    # GitHub API and remembers it across crawls, replacing the guessed /main/README.md URL. Once
+    # the API's rate limit is used up, URLs are guessed again until it resets
+    def __init__(self, cache_file, api_url, token, miss_ttl_days, stats):
+        self.cache_file = cache_file
+        self.api_url = api_url.rstrip("/")
+        self.token = token
+        self.miss_ttl_seconds = miss_ttl_days * 24 * 60 * 60
+        self.stats = stats
+        self.cache = {}
+        # Repositories whose lookup failed in this crawl, they aren't looked up again
+        self.unresolved = set()
+        self.paused_until = 0
+
+        if not token:
+            logger.warning("No GITHUB_TOKEN, READMEs are resolved with 60 API calls per hour")
+
+        if os.path.exists(cache_file):
+            with open(cache_file, "r") as f:
+                self.cache = json.load(f)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        middleware = cls(
+            settings.get("README_RESOLUTION_CACHE_FILE"),
+            settings.get("GITHUB_API_URL"),
+            settings.get("GITHUB_TOKEN"),
+            settings.getint("README_RESOLUTION_MISS_TTL_DAYS"),
+            crawler.stats,
+        )
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request, spider):
+        if "readme_repo" in request.meta or not request.url.endswith("/main/README.md"):
+            return None
+
+        repo = repo_slug(request.url)
+        resolution = self.cache.get(repo)
+
+        if resolution is None or self._expired(resolution):
+            if repo in self.unresolved or time.time() < self.paused_until:
+                self.stats.inc_value("readme/resolution_skipped")
+                return None
+
+            return self._resolution_request(repo, request)
+
+        self.stats.inc_value("readme/resolution_cache_hits")
+
+        if resolution["url"] is None:
+            raise IgnoreRequest(f"{repo} has no README")
+
+        return self._readme_request(repo, request, resolution["url"])
+
+    def process_response(self, request, response, spider):
+        if "readme_resolution_for" in request.meta:
+            return self._resolved(request, response)
+
+        # The README moved since it was cached, look it up again
+        if response.status == 404 and request.meta.get("readme_from_cache"):
+            repo = request.meta["readme_repo"]
+            self.cache.pop(repo, None)
+            self.stats.inc_value("readme/wasted_requests")
+            return self._resolution_request(repo, request.meta["readme_guess"])
+
+        return response
+
+    def _expired(self, resolution):
+        return resolution["url"] is None \
+            and time.time() - resolution["resolved_at"] > self.miss_ttl_seconds
+
+    def _resolution_request(self, repo, guessed_request):
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        return Request(
+            f"{self.api_url}/repos/{repo}/readme",
+            headers=headers,
+            meta={"readme_resolution_for": (repo, guessed_request), "handle_httpstatus_all": True},
+            priority=guessed_request.priority,
+            dont_filter=True,
+        )
+
+    def _readme_request(self, repo, guessed_request, url, from_cache=True):
+        return guessed_request.replace(
+            url=url,
+            meta={
+                **guessed_request.meta,
+                "readme_repo": repo,
+                "readme_guess": guessed_request,
+                "readme_resolved": True,
+                "readme_from_cache": from_cache,
+            },
+        )
+
+    def _resolved(self, request, response):
+        repo, guessed_request = request.meta["readme_resolution_for"]
+        self._pause_if_exhausted(response)
+
+        if response.status == 404:
+            self.cache[repo] = {"url": None, "resolved_at": time.time()}
+            self.stats.inc_value("readme/missing")
+            raise IgnoreRequest(f"{repo} has no README")
+
+        if response.status != 200:
+            # Rate limited or GitHub is down, fall back to guessing the branch
+            self.unresolved.add(repo)
+            self.stats.inc_value("readme/resolution_failures")
+            return guessed_request.replace(meta={**guessed_request.meta, "readme_repo": repo})
+
+        url = json.loads(response.text)["download_url"]
+        self.cache[repo] = {"url": url, "resolved_at": time.time()}
+        self.stats.inc_value("readme/resolved")
+
+        return self._readme_request(repo, guessed_request, url, from_cache=False)
+
+    def _pause_if_exhausted(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None or int(remaining) > 0:
+            return
+
+        reset = response.headers.get("X-RateLimit-Reset")
+        self.paused_until = float(reset) if reset else time.time() + 60
+        self.stats.inc_value("readme/resolution_pauses")
+        logger.info(
+            "GitHub API rate limit used up, guessing README URLs for %.0fs",
+            self.paused_until - time.time(),
+        )
+
+    def spider_closed(self, spider):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+
+        temporary_path = f"{self.cache_file}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.cache, f)
+        os.replace(temporary_path, self.cache_file)
+
+
+class ConditionalRequestMiddleware:
+    # Remembers each README's ETag/Last-Modified across crawls and revalidates instead of
+    # re-downloading; unchanged files come back as an empty 304
+    def __init__(self, validators_file, stats):
+        self.validators_file = validators_file
+        self.stats = stats
+        self.validators = {}
+
+        if os.path.exists(validators_file):
+            with open(validators_file, "r") as f:
+                self.validators = json.load(f)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler.settings.get("HTTP_VALIDATORS_FILE"), crawler.stats)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request, spider):
+        validators = self.validators.get(request.url)
+
+        # Only files we still have a copy of can be revalidated
+        if not request.meta.get("conditional") or not validators:
+            return None
+
+        if validators.get("etag"):
+            request.headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            request.headers["If-Modified-Since"] = validators["last_modified"]
+
+        self.stats.inc_value("conditional/requests")
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 304:
+            self.stats.inc_value("conditional/not_modified")
+            return response
+
+        if response.status == 200 and request.meta.get("conditional") is not None:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+            if etag or last_modified:
+                self.validators[request.url] = {
+                    "etag": etag.decode() if etag else None,
+                    "last_modified": last_modified.decode() if last_modified else None,
+                }
+
+            if request.headers.get("If-None-Match") or request.headers.get("If-Modified-Since"):
+                self.stats.inc_value("conditional/modified")
+
+        return response
+
+    def spider_closed(self, spider):
+        os.makedirs(os.path.dirname(self.validators_file), exist_ok=True)
+
+        temporary_path = f"{self.validators_file}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.validators, f)
+        os.replace(temporary_path, self.validators_file)
+
+
+class AdaptiveThrottleMiddleware:
+    # Tunes each host's download slot towards the fastest rate it tolerates: concurrency grows by
+    # one and the delay shrinks after every clean round of responses, both are halved/doubled on
+    # throttling, and Retry-After / rate-limit headers set a floor for the delay until they expire
+    THROTTLED_STATUSES = (429, 503)
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.min_delay = settings.getfloat("ADAPTIVE_THROTTLE_MIN_DELAY")
+        self.max_delay = settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY")
+        self.max_concurrency = settings.getint("ADAPTIVE_THROTTLE_MAX_CONCURRENCY")
+        self.target_latency = settings.getfloat("ADAPTIVE_THROTTLE_TARGET_LATENCY")
+        self.max_error_rate = settings.getfloat("ADAPTIVE_THROTTLE_MAX_ERROR_RATE")
+        self.log_interval = settings.getfloat("ADAPTIVE_THROTTLE_LOG_INTERVAL")
+        self.slot_states = {}
+        self.logged_at = time.time()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_THROTTLE_ENABLED"):
+            raise NotConfigured
+
+        return cls(crawler)
+
+    def process_response(self, request, response, spider):
+        slot_key, slot = self._slot(request)
+        if slot is None:
+            return response
+
+        state = self._state(slot_key, slot)
+        throttled = response.status in self.THROTTLED_STATUSES
+        failed = throttled or response.status >= 500
+        state["latency"] = self._average(state["latency"], request.meta.get("download_latency", 0))
+        state["error_rate"] = self._average(state["error_rate"], float(failed))
+        self._update_floor(state, response, slot)
+
+        if throttled:
+            state["clean_responses"] = 0
+            state["throttled"] += 1
+            slot.concurrency = max(1, slot.concurrency // 2)
+            state["delay"] = min(self.max_delay, max(state["delay"] * 2, self.min_delay))
+        elif not failed:
+            self._speed_up(state, slot)
+
+        self._apply_delay(state, slot)
+        self._publish(slot_key, slot, state)
         return response
+
+    def process_exception(self, request, exception, spider):
+        slot_key, slot = self._slot(request)
+        if slot is None:
+            return None
+
+        # Timeouts and dropped connections are treated as a milder kind of throttling
+        state = self._state(slot_key, slot)
+        state["error_rate"] = self._average(state["error_rate"], 1.0)
+        state["clean_responses"] = 0
+        state["delay"] = min(self.max_delay, max(state["delay"] * 1.5, self.min_delay))
+
+        self._apply_delay(state, slot)
+        self._publish(slot_key, slot, state)
+        return None
+
+    def _slot(self, request):
+        downloader = self.crawler.engine.downloader
+        slot_key = downloader.get_slot_key(request)
+        return slot_key, downloader.slots.get(slot_key)
+
+    def _state(self, slot_key, slot):
+        # "delay" is the latency-driven delay, the slot's actual delay is never below the floor
+        # set by Retry-After or rate-limit headers until that floor's time is up
+        return self.slot_states.setdefault(slot_key, {
+            "latency": None,
+            "error_rate": 0.0,
+            "clean_responses": 0,
+            "throttled": 0,
+            "delay": slot.delay,
+            "floor": 0.0,
+            "floor_until": 0.0,
+        })
+
+    def _average(self, average, value, weight=0.2):
+        return value if average is None else (1 - weight) * average + weight * value
+
+    def _speed_up(self, state, slot):
+        state["clean_responses"] += 1
+
+        # Only step up once a full round at the current concurrency came back clean
+        if state["clean_responses"] < slot.concurrency:
+            return
+
+        state["clean_responses"] = 0
+        if state["error_rate"] > self.max_error_rate or state["latency"] > self.target_latency:
+            return
+
+        slot.concurrency = min(self.max_concurrency, slot.concurrency + 1)
+        state["delay"] = max(self.min_delay, state["delay"] * 0.8)
+
+    def _update_floor(self, state, response, slot):
+        retry_after = self._retry_after(response)
+        floor, floor_for = (retry_after, retry_after) if retry_after \
+            else self._rate_limit_wait(response, slot)
+
+        if floor:
+            state["floor"] = floor
+            state["floor_until"] = time.time() + floor_for
+
+    def _apply_delay(self, state, slot):
+        floor = state["floor"] if time.time() < state["floor_until"] else 0
+        slot.delay = min(self.max_delay, max(state["delay"], floor))
+
+    def _retry_after(self, response):
+        retry_after = response.headers.get("Retry-After")
+        if not retry_after:
+            return 0
+
+        retry_after = retry_after.decode()
+        if retry_after.isdigit():
+            return float(retry_after)
+
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0
+
+    def _rate_limit_wait(self, response, slot):
+        remaining = response.headers.get("X-RateLimit-Remaining") \
+            or response.headers.get("RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset") or response.headers.get("RateLimit-Reset")
+        if remaining is None or reset is None:
+            return 0, 0
+
+        remaining, reset = int(remaining), float(reset)
+        # X-RateLimit-Reset is an epoch timestamp, the IETF RateLimit-Reset is in seconds
+        reset_in = max(0.0, reset - time.time()) if reset > 1e9 else reset
+
+        # Spread the remaining budget over the window once it gets close to running out. The
+        # spacing only holds until the window resets
+        if remaining > 2 * slot.concurrency:
+            return 0, 0
+
+        return reset_in / max(remaining, 1), reset_in
+
+    def _publish(self, slot_key, slot, state):
+        stats = self.crawler.stats
+        stats.set_value(f"adaptive_throttle/{slot_key}/concurrency", slot.concurrency)
+        stats.set_value(f"adaptive_throttle/{slot_key}/delay", round(slot.delay, 3))
+        stats.set_value(f"adaptive_throttle/{slot_key}/latency", round(state["latency"] or 0, 3))
+        stats.set_value(f"adaptive_throttle/{slot_key}/error_rate", round(state["error_rate"], 3))
+        stats.set_value(f"adaptive_throttle/{slot_key}/throttled", state["throttled"])
+
+        if time.time() - self.logged_at >= self.log_interval:
+            self.logged_at = time.time()
+            for key, slot_state in self.slot_states.items():
+                logger.info(
+                    "Adaptive throttle %s: concurrency=%s delay=%.2fs latency=%.2fs errors=%.0f%%",
+                    key,
+                    stats.get_value(f"adaptive_throttle/{key}/concurrency"),
+                    stats.get_value(f"adaptive_throttle/{key}/delay"),
+                    slot_state["latency"] or 0,
+                    100 * slot_state["error_rate"],
+                )
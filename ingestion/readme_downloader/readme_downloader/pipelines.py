@@ -1,20 +1,122 @@
+import json
+import os
+import sys
+
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
 from scrapy.pipelines.files import FilesPipeline
+from twisted.internet.threads import deferToThread
 
 from readme_downloader.helpers import raw_readme_url, repo_user, repo_name
 
 
 class RawReadmeUrlsPipeline:
     def process_item(self, item, spider):
-        return {"file_urls": list(map(raw_readme_url, item["repo_urls"]))}
+        return {**item, "file_urls": [raw_readme_url(item["repo_url"])]}
 
 
-class FilterReadmeUrlsPipeline:
-    def process_item(self, item, spider):
-        urls = item["file_urls"]
-        return {"file_urls": urls[:spider.readme_limit or len(urls) + 1]}
+UNCHANGED_FILE_STATUSES = ("unchanged", "uptodate")
+
+
+def project_metadata(item):
+    # Everything the spider knows about the project (repo URL, course, cohort, ...)
+    return {key: value for key, value in item.items() if key not in ("file_urls", "files")}
 
 
 class ReadmeFilesPipeline(FilesPipeline):
     def file_path(self, request, response=None, info=None, *, item=None):
         readme_url = request.url
         return f"{repo_user(readme_url)}_{repo_name(readme_url)}.md"
+
+    def get_media_requests(self, item, info):
+        for file_url in item.get(self.files_urls_field, []):
+            request = Request(file_url)
+            stored_path = os.path.join(self.store.basedir, self.file_path(request, item=item))
+
+            # Tells ConditionalRequestMiddleware it may send the file's validators
+            request.meta["conditional"] = os.path.exists(stored_path)
+            yield request
+
+    def media_downloaded(self, response, request, info, *, item=None):
+        if response.status != 304:
+            return super().media_downloaded(response, request, info, item=item)
+
+        # Not modified since the last crawl, the stored copy is still current
+        return {
+            "url": request.url,
+            "path": self.file_path(request, response=response, info=info, item=item),
+            "checksum": None,
+            "status": "unchanged",
+        }
+
+
+class ProjectMetadataPipeline:
+    # Records which project each README file belongs to, readme_embedder copies it onto the
+    # README's chunks so retrieval can filter by course or cohort
+    def __init__(self, metadata_file):
+        self.metadata_file = metadata_file
+        self.project_metadata = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.get("PROJECT_METADATA_FILE"))
+
+    def open_spider(self, spider):
+        # Merged into, so a crawl with a limit keeps the metadata of the other projects
+        if os.path.exists(self.metadata_file):
+            with open(self.metadata_file, "r") as f:
+                self.project_metadata = json.load(f)
+
+    def process_item(self, item, spider):
+        for file in item.get("files", []):
+            self.project_metadata[os.path.basename(file["path"])] = project_metadata(item)
+
+        return item
+
+    def close_spider(self, spider):
+        os.makedirs(os.path.dirname(self.metadata_file), exist_ok=True)
+
+        temporary_path = f"{self.metadata_file}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.project_metadata, f, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.metadata_file)
+
+
+class EmbedReadmesPipeline:
+    def __init__(self, embedder_dir):
+        self.embedder_dir = embedder_dir
+        self.embedder = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("EMBED_WHILE_CRAWLING"):
+            raise NotConfigured
+
+        return cls(crawler.settings.get("EMBEDDER_DIR"))
+
+    def open_spider(self, spider):
+        # readme_embedder is a set of scripts rather than a package
+        sys.path.insert(0, self.embedder_dir)
+        from streaming import StreamingEmbedder
+
+        self.embedder = StreamingEmbedder()
+        self.embedder.start()
+
+    def process_item(self, item, spider):
+        file_names = [
+            os.path.basename(file["path"]) for file in item.get("files", [])
+            if file["status"] not in UNCHANGED_FILE_STATUSES
+        ]
+
+        # A full embed queue blocks in a thread, so the reactor keeps running while the
+        # pipeline (and with it the crawl) waits for the embedder to catch up
+        return deferToThread(
+            self.submit_files, file_names, project_metadata(item)
+        ).addCallback(lambda _: item)
+
+    def submit_files(self, file_names, metadata):
+        for file_name in file_names:
+            self.embedder.submit(file_name, metadata)
+
+    def close_spider(self, spider):
+        return deferToThread(self.embedder.close)
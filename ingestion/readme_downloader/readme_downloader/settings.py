@@ -26,11 +26,24 @@ ROBOTSTXT_OBEY = False
 
 IS_GOOGLE_COLAB = os.environ.get("IS_GOOGLE_COLAB") == "true"
 
-# Concurrency and throttling settings
+# Concurrency and throttling settings, with adaptive throttling these are only the starting point
 CONCURRENT_REQUESTS = 10 if IS_GOOGLE_COLAB else 4
 CONCURRENT_REQUESTS_PER_DOMAIN = 10 if IS_GOOGLE_COLAB else 4
 DOWNLOAD_DELAY = 2.5 if IS_GOOGLE_COLAB else 4
 
+# Adaptive throttling: per-host concurrency and delay follow observed latency, errors and the
+# server's Retry-After / rate-limit headers. Live values are in the adaptive_throttle/* stats
+ADAPTIVE_THROTTLE_ENABLED = os.environ.get("ADAPTIVE_THROTTLE_ENABLED", "true") == "true"
+ADAPTIVE_THROTTLE_MIN_DELAY = 0.25
+ADAPTIVE_THROTTLE_MAX_DELAY = 60
+ADAPTIVE_THROTTLE_MAX_CONCURRENCY = 16
+ADAPTIVE_THROTTLE_TARGET_LATENCY = 2.0
+ADAPTIVE_THROTTLE_MAX_ERROR_RATE = 0.05
+ADAPTIVE_THROTTLE_LOG_INTERVAL = 60
+if ADAPTIVE_THROTTLE_ENABLED:
+    # The global cap must not hold back what the per-host slots settle on
+    CONCURRENT_REQUESTS = 2 * ADAPTIVE_THROTTLE_MAX_CONCURRENCY
+
 # Disable cookies (enabled by default)
 # COOKIES_ENABLED = False
 
@@ -52,7 +65,13 @@ DOWNLOAD_DELAY = 2.5 if IS_GOOGLE_COLAB else 4
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 DOWNLOADER_MIDDLEWARES = {
+   "readme_downloader.middlewares.ReadmeResolutionMiddleware": 530,
    "readme_downloader.middlewares.BranchFallbackMiddleware": 543,
+   "readme_downloader.middlewares.ConditionalRequestMiddleware": 560,
+   # Responses pass it after RedirectMiddleware (600) and before HttpCompressionMiddleware (590)
+   # and RetryMiddleware (550), so it sees 429/503 before they are retried. It only reads status
+   # and headers, which are not compressed
+   "readme_downloader.middlewares.AdaptiveThrottleMiddleware": 595,
 }
 
 # Enable or disable extensions
@@ -66,8 +85,21 @@ DOWNLOADER_MIDDLEWARES = {
 ITEM_PIPELINES = {
    "readme_downloader.pipelines.RawReadmeUrlsPipeline": 100,
    "readme_downloader.pipelines.ReadmeFilesPipeline": 200,
+   "readme_downloader.pipelines.ProjectMetadataPipeline": 250,
+   "readme_downloader.pipelines.EmbedReadmesPipeline": 300,
+}
+
+# Item fields copied from the projects CSV columns, so every README keeps its course and cohort
+PROJECT_METADATA_COLUMNS = {
+    "course": "course",
+    "cohort": "cohort",
+    "project_title": "project_title",
 }
 
+# Embed and upsert READMEs as they are downloaded instead of running embedder.py afterwards
+EMBED_WHILE_CRAWLING = os.environ.get("EMBED_WHILE_CRAWLING") == "true"
+EMBEDDER_DIR = os.path.join(PROJECT_ROOT, "readme_embedder")
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 # AUTOTHROTTLE_ENABLED = True
@@ -95,6 +127,22 @@ FEED_EXPORT_ENCODING = "utf-8"
 
 # Store downloaded README.md files
 FILES_STORE = os.path.join(PROJECT_ROOT, "data", "readme_files")
+# Revalidate every stored README on each crawl, conditional requests make unchanged ones cheap
+FILES_EXPIRES = 0
+
+# Project metadata (repo URL, course, cohort, ...) per README file, read by readme_embedder
+PROJECT_METADATA_FILE = os.path.join(PROJECT_ROOT, "data", "project_metadata.json")
+
+# Resolved README URL (default branch and file name) per repository, kept between crawls.
+# Repositories without a README are looked up again after README_RESOLUTION_MISS_TTL_DAYS
+README_RESOLUTION_CACHE_FILE = os.path.join(PROJECT_ROOT, "data", "readme_resolutions.json")
+README_RESOLUTION_MISS_TTL_DAYS = 7
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL") or "https://api.github.com"
+# Unauthenticated GitHub API calls are limited to 60 per hour
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN") or ""
+
+# ETag/Last-Modified of downloaded READMEs, kept between crawls for conditional requests
+HTTP_VALIDATORS_FILE = os.path.join(PROJECT_ROOT, "data", "http_validators.json")
 
 
 RETRY_TIMES = 10
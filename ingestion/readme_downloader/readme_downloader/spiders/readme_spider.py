@@ -1,7 +1,10 @@
 from csv import DictReader
+from io import StringIO
 
 from scrapy.spiders import Spider
 
+from readme_downloader.helpers import normalize_repo_url, repo_slug
+
 
 class ReadmeSpider(Spider):
     name = "readme-spider"
@@ -12,8 +15,31 @@ class ReadmeSpider(Spider):
 
     def __init__(self, limit=0, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.readme_limit = limit
+        self.readme_limit = int(limit)
+        self.seen_repos = set()
 
     def parse(self, response):
-        project_data_reader = DictReader(response.text.split("\n"))
-        return {"repo_urls": [project_data["project_url"] for project_data in project_data_reader]}
+        metadata_columns = self.settings.getdict("PROJECT_METADATA_COLUMNS")
+
+        # One item per project, yielded as the rows are read so their downloads are scheduled
+        # straight away instead of after the whole CSV has been turned into a list
+        for project_data in DictReader(StringIO(response.text)):
+            if self.readme_limit and len(self.seen_repos) >= self.readme_limit:
+                return
+
+            repo_url = normalize_repo_url(project_data.get("project_url") or "")
+            if repo_url is None:
+                self.crawler.stats.inc_value("projects/invalid_url")
+                continue
+
+            # GitHub owner and repository names are case-insensitive
+            if repo_slug(repo_url).lower() in self.seen_repos:
+                self.crawler.stats.inc_value("projects/duplicate")
+                continue
+            self.seen_repos.add(repo_slug(repo_url).lower())
+
+            yield {
+                "repo_url": repo_url,
+                **{field: (project_data.get(column) or "").strip() or None
+                   for field, column in metadata_columns.items()},
+            }
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from scrapy import Request
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import Response, TextResponse
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+
+from readme_downloader.middlewares import ReadmeResolutionMiddleware
+
+
+API_URL = "http://127.0.0.1:8765"
+GUESSED_URL = "https://raw.githubusercontent.com/owner/repo/main/README.md"
+DOWNLOAD_URL = "https://raw.githubusercontent.com/owner/repo/trunk/readme.rst"
+
+
+class ReadmeResolutionMiddlewareTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_file = os.path.join(tempfile.mkdtemp(), "readme_resolutions.json")
+        self.stats = MemoryStatsCollector(SimpleNamespace(settings=Settings()))
+        self.middleware = self.make_middleware()
+
+    def make_middleware(self):
+        return ReadmeResolutionMiddleware(self.cache_file, API_URL, "token", 7, self.stats)
+
+    def resolve(self, status, body=None, headers=None):
+        # Stands in for the GitHub API: the lookup request is answered without a download
+        lookup = self.middleware.process_request(Request(GUESSED_URL), None)
+        self.assertEqual(lookup.url, f"{API_URL}/repos/owner/repo/readme")
+
+        response = TextResponse(
+            lookup.url,
+            status=status,
+            body=json.dumps(body or {}).encode(),
+            headers=headers or {},
+            encoding="utf-8",
+        )
+        return self.middleware.process_response(lookup, response, None)
+
+    def test_resolves_readme_url_and_caches_it(self):
+        request = self.resolve(200, {"download_url": DOWNLOAD_URL})
+
+        self.assertEqual(request.url, DOWNLOAD_URL)
+        self.assertTrue(request.meta["readme_resolved"])
+        self.assertEqual(self.stats.get_value("readme/resolved"), 1)
+
+        self.middleware.spider_closed(None)
+        cached = self.make_middleware().process_request(Request(GUESSED_URL), None)
+        self.assertEqual(cached.url, DOWNLOAD_URL)
+        self.assertEqual(self.stats.get_value("readme/resolution_cache_hits"), 1)
+
+    def test_falls_back_to_guessing_on_errors(self):
+        request = self.resolve(502)
+
+        self.assertEqual(request.url, GUESSED_URL)
+        self.assertNotIn("readme_resolved", request.meta)
+        self.assertEqual(self.stats.get_value("readme/resolution_failures"), 1)
+
+    def test_caches_missing_readmes(self):
+        with self.assertRaises(IgnoreRequest):
+            self.resolve(404)
+
+        with self.assertRaises(IgnoreRequest):
+            self.middleware.process_request(Request(GUESSED_URL), None)
+
+    def test_does_not_look_up_a_failed_repository_again(self):
+        self.resolve(500)
+
+        self.assertIsNone(self.middleware.process_request(Request(GUESSED_URL), None))
+        self.assertEqual(self.stats.get_value("readme/resolution_skipped"), 1)
+
+    def test_guesses_until_the_rate_limit_resets(self):
+        reset = time.time() + 600
+        self.resolve(403, headers={
+            "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(reset)),
+        })
+
+        other = Request("https://raw.githubusercontent.com/other/repo/main/README.md")
+        self.assertIsNone(self.middleware.process_request(other, None))
+
+        self.middleware.paused_until = time.time() - 1
+        self.assertIn("/repos/other/repo/readme", self.middleware.process_request(other, None).url)
+
+    def test_looks_up_moved_readme_again(self):
+        self.resolve(200, {"download_url": DOWNLOAD_URL})
+        cached = self.middleware.process_request(Request(GUESSED_URL), None)
+
+        lookup = self.middleware.process_response(cached, Response(DOWNLOAD_URL, status=404), None)
+        self.assertEqual(lookup.url, f"{API_URL}/repos/owner/repo/readme")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import re
+
+from llama_index.core.schema import TransformComponent
+
+from config import MAX_CODE_BLOCK_LINES, README_CLEANING_RULES
+
+
+BADGE_PATTERN = re.compile(
+    r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)"
+    r"|!\[[^\]]*\]\([^)]*(?:shields\.io|badge|travis-ci|codecov|circleci)[^)]*\)",
+    re.IGNORECASE,
+)
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\]]+)\]\([^)]*\)")
+HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+HTML_IMAGE_PATTERN = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+HTML_TAG_PATTERN = re.compile(r"</?[a-zA-Z][^>]*>")
+CODE_BLOCK_PATTERN = re.compile(
+    r"^((```|~~~)[^\n]*)\n(.*?)^\2[ \t]*$", re.DOTALL | re.MULTILINE
+)
+INLINE_CODE_PATTERN = re.compile(r"`[^`\n]+`")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$", re.MULTILINE)
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+LICENSE_HEADINGS = ("license", "licence", "licensing")
+
+
+def strip_badges(text):
+    return BADGE_PATTERN.sub("", text)
+
+
+def strip_images(text):
+    # Alt text often names what the image shows ("Architecture diagram"), so it is kept
+    text = HTML_IMAGE_PATTERN.sub("", text)
+    return IMAGE_PATTERN.sub(lambda match: match.group(1), text)
+
+
+def strip_link_urls(text):
+    return LINK_PATTERN.sub(lambda match: match.group(1), text)
+
+
+def outside_code(clean, text):
+    # Applies clean to the prose only, `List<T>` or `<placeholder>` in code is not markup
+    pieces, start = [], 0
+
+    for match in CODE_BLOCK_PATTERN.finditer(text):
+        pieces.append(outside_inline_code(clean, text[start:match.start()]))
+        pieces.append(match.group(0))
+        start = match.end()
+    pieces.append(outside_inline_code(clean, text[start:]))
+
+    return "".join(pieces)
+
+
+def outside_inline_code(clean, text):
+    pieces, start = [], 0
+
+    for match in INLINE_CODE_PATTERN.finditer(text):
+        pieces.append(clean(text[start:match.start()]))
+        pieces.append(match.group(0))
+        start = match.end()
+    pieces.append(clean(text[start:]))
+
+    return "".join(pieces)
+
+
+def strip_html(text):
+    return outside_code(
+        lambda prose: HTML_TAG_PATTERN.sub("", HTML_COMMENT_PATTERN.sub("", prose)), text
+    )
+
+
+def truncate_code_blocks(text, max_lines=MAX_CODE_BLOCK_LINES):
+    def truncate(match):
+        lines = match.group(3).splitlines()
+        if len(lines) <= max_lines:
+            return match.group(0)
+
+        opening_fence, fence = match.group(1), match.group(2)
+        return f"{opening_fence}\n" + "\n".join(lines[:max_lines]) + f"\n...\n{fence}"
+
+    return CODE_BLOCK_PATTERN.sub(truncate, text)
+
+
+def strip_license(text):
+    # Drops a License section up to the next heading of the same or a higher level
+    headings = list(HEADING_PATTERN.finditer(text))
+
+    for index, heading in enumerate(headings):
+        if heading.group(2).strip(" #*:").lower() not in LICENSE_HEADINGS:
+            continue
+
+        level = len(heading.group(1))
+        end = next(
+            (next_heading.start() for next_heading in headings[index + 1:]
+             if len(next_heading.group(1)) <= level),
+            len(text),
+        )
+        return strip_license(text[:heading.start()] + text[end:])
+
+    return text
+
+
+CLEANING_RULES = {
+    "badges": strip_badges,
+    "images": strip_images,
+    "links": strip_link_urls,
+    "html": strip_html,
+    "code": truncate_code_blocks,
+    "license": strip_license,
+}
+
+
+def clean_readme(text, rules=README_CLEANING_RULES):
+    # Applied in CLEANING_RULES order, a badge is an image inside a link so it has to go first
+    for rule, clean in CLEANING_RULES.items():
+        if rule in rules:
+            text = clean(text)
+
+    return BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+
+
+class ReadmeCleaner(TransformComponent):
+    rules: tuple = README_CLEANING_RULES
+
+    def __call__(self, nodes, **kwargs):
+        for node in nodes:
+            node.set_content(clean_readme(node.get_content(), self.rules))
+
+        return nodes
+
+
+def load_readme_cleaner():
+    return ReadmeCleaner()
@@ -0,0 +1,40 @@
+import os
+import sys
+
+from llama_index.core.utils import get_tokenizer
+
+from cleaning import clean_readme
+from config import DATA_DIR
+from document_parser import load_document_parser
+from documents import iter_documents
+
+
+def main(file_names):
+    # Parses the READMEs with and without cleaning to compare their size, nothing is embedded
+    tokenizer = get_tokenizer()
+    parser = load_document_parser()
+    totals = {"raw": [0, 0], "cleaned": [0, 0]}
+
+    for document in iter_documents(file_names):
+        raw_text = document.get_content()
+
+        for version, text in (("raw", raw_text), ("cleaned", clean_readme(raw_text))):
+            document.set_content(text)
+            totals[version][0] += len(tokenizer(text))
+            totals[version][1] += len(parser.get_nodes_from_documents([document]))
+
+    for version, (tokens, chunks) in totals.items():
+        print(f"{version:>8}: {tokens} tokens in {chunks} chunks")
+
+    raw_tokens, raw_chunks = totals["raw"]
+    cleaned_tokens, cleaned_chunks = totals["cleaned"]
+    if raw_tokens and raw_chunks:
+        print(
+            f"Cleaning removes {1 - cleaned_tokens / raw_tokens:.1%} of the tokens and "
+            f"{1 - cleaned_chunks / raw_chunks:.1%} of the chunks"
+        )
+
+
+# Usage: python cleaning_report.py [README file names], defaults to every downloaded README
+if __name__ == "__main__":
+    main(sys.argv[1:] or sorted(os.listdir(DATA_DIR)))
@@ -13,6 +13,71 @@ EMBEDDINGS_MODEL_NAME = "mixedbread-ai/mxbai-embed-large-v1"
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DATA_DIR = os.path.join(PROJECT_ROOT, "ingestion", "data", "readme_files")
 
+# Repo URL, course, cohort etc. per README file (made by readme_downloader), stored on every chunk
+PROJECT_METADATA_FILE = os.path.join(PROJECT_ROOT, "ingestion", "data", "project_metadata.json")
+
+# Streaming Ingestion Pipeline
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS") or os.cpu_count() or 1)
+PARSE_BATCH_SIZE = 16
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE") or 64)
+
+# READMEs waiting to be embedded while crawling, the crawl slows down once this many are queued
+EMBED_QUEUE_SIZE = 256
+
+# Vector Upserts: batches in flight at once, and retries with exponential backoff on throttling
+UPSERT_BATCH_SIZE = int(os.environ.get("UPSERT_BATCH_SIZE") or 100)
+UPSERT_MAX_IN_FLIGHT = int(os.environ.get("UPSERT_MAX_IN_FLIGHT") or 4)
+UPSERT_MAX_RETRIES = 6
+UPSERT_BACKOFF_SECONDS = 1.0
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Pinecone deletes at most 1000 ids per request
+DELETE_BATCH_SIZE = 1000
+
+# Upsert progress of an interrupted run, so the next run resumes after the acknowledged batches
+CHECKPOINT_FILE = os.path.join(PROJECT_ROOT, "ingestion", "data", "upsert-checkpoint.json")
+
+# Content hashes and node ids of every embedded README, one manifest per vector store backend
+MANIFEST_FILE = os.path.join(PROJECT_ROOT, "ingestion", "data", "manifest-{backend}.json")
+
+
+# Near-Duplicate READMEs (forks, course templates): only one README per cluster is embedded.
+# MinHash signatures over word shingles, LSH bands pick candidate pairs
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "true") == "true"
+DEDUP_SIMILARITY_THRESHOLD = float(os.environ.get("DEDUP_SIMILARITY_THRESHOLD") or 0.8)
+DEDUP_SHINGLE_SIZE = 5
+DEDUP_NUM_PERMUTATIONS = 128
+DEDUP_BANDS = 16
+
+# Canonical README of every cluster and the near-duplicates that were skipped for it
+DEDUP_CLUSTERS_FILE = os.path.join(PROJECT_ROOT, "ingestion", "data", "readme-clusters.json")
+
+
+# README Cleaning before chunking, any of: badges, images, links, html, code, license
+README_CLEANING_RULES = tuple(
+    rule for rule in (
+        os.environ.get("README_CLEANING_RULES") or "badges,images,links,html,code,license"
+    ).split(",") if rule
+)
+# Longer fenced code blocks are cut to their first lines
+MAX_CODE_BLOCK_LINES = 15
+# Part of every README's manifest hash with the settings above: bump it when the cleaning
+# rules change, so the indexed READMEs are cleaned and embedded again
+CLEANING_VERSION = 2
+
+
+# Vector Store Backend: "pinecone" (serverless index) or "local" (on-disk IVF index)
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "pinecone")
+
+# Local Vector Index (queried by the agent)
+LOCAL_INDEX_DIR = os.environ.get("LOCAL_INDEX_DIR") or os.path.join(
+    PROJECT_ROOT, "data", "vector_index"
+)
+
+# Keyword (BM25) index of the same chunks, fused with the vector search by the agent
+SPARSE_INDEX_FILE = os.environ.get("SPARSE_INDEX_FILE") or os.path.join(
+    PROJECT_ROOT, "data", f"sparse_index-{VECTOR_STORE_BACKEND}.sqlite3"
+)
+
 
 # Pinecone Index and Vector Store Settings
 INDEX_NAME = "capstone-project-recommender-index"
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from config import (
+    DATA_DIR,
+    DEDUP_BANDS,
+    DEDUP_CLUSTERS_FILE,
+    DEDUP_NUM_PERMUTATIONS,
+    DEDUP_SHINGLE_SIZE,
+    DEDUP_SIMILARITY_THRESHOLD,
+)
+
+
+# Hash permutations h(x) = (a * x + b) mod p over 32-bit shingle hashes. a stays below 2 ** 31 so
+# the products fit in uint64 without overflowing, and p is far below the products so the modulo
+# actually scrambles them (with p = 2 ** 61 - 1 every permutation kept the same minimum)
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(0)
+PERMUTATION_A = _rng.integers(1, 1 << 31, DEDUP_NUM_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _rng.integers(0, 1 << 31, DEDUP_NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text, size=DEDUP_SHINGLE_SIZE):
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[start:start + size]) for start in range(max(1, len(words) - size + 1))}
+
+
+def minhash_signature(text):
+    shingle_hashes = np.array([
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+        for shingle in shingles(text)
+    ], dtype=np.uint64)
+
+    hashes = (np.outer(shingle_hashes, PERMUTATION_A) + PERMUTATION_B) % MERSENNE_PRIME
+    return hashes.min(axis=0)
+
+
+def similar_pairs(signatures, threshold, bands):
+    # Documents sharing any band are candidates, then the estimated Jaccard similarity of the
+    # full signatures decides, for every pair of documents in a bucket
+    rows = DEDUP_NUM_PERMUTATIONS // bands
+    compared, similar = set(), defaultdict(set)
+
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for index, band_hashes in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets[band_hashes.tobytes()].append(index)
+
+        for candidates in buckets.values():
+            for position, first in enumerate(candidates[:-1]):
+                others = [other for other in candidates[position + 1:]
+                          if (first, other) not in compared]
+                if not others:
+                    continue
+
+                compared.update((first, other) for other in others)
+                similarities = np.mean(signatures[others] == signatures[first], axis=1)
+                for other, similarity in zip(others, similarities):
+                    if similarity >= threshold:
+                        similar[first].add(other)
+                        similar[other].add(first)
+
+    return similar
+
+
+def cluster_near_duplicates(texts, threshold=DEDUP_SIMILARITY_THRESHOLD, bands=DEDUP_BANDS):
+    # texts maps file names to contents. Returns {canonical file: [near-duplicate files]} for
+    # every cluster with more than one member
+    file_names = sorted(texts)
+    signatures = np.stack([minhash_signature(texts[file_name]) for file_name in file_names]) \
+        if file_names else np.empty((0, DEDUP_NUM_PERMUTATIONS), dtype=np.uint64)
+    similar = similar_pairs(signatures, threshold, bands)
+
+    # The longest README of a cluster is usually the most complete one, so it becomes the
+    # canonical one and only READMEs similar to it join. Similarity isn't transitive, chaining
+    # A~B and B~C would merge A and C even when they are nothing alike
+    by_length = sorted(
+        range(len(file_names)),
+        key=lambda index: (len(texts[file_names[index]]), file_names[index]),
+        reverse=True,
+    )
+    clustered = set()
+    deduplicated = {}
+
+    for canonical in by_length:
+        if canonical in clustered:
+            continue
+
+        members = similar[canonical] - clustered
+        clustered.add(canonical)
+        clustered.update(members)
+
+        if members:
+            deduplicated[file_names[canonical]] = sorted(file_names[index] for index in members)
+
+    return deduplicated
+
+
+def find_duplicates(file_names, data_dir=DATA_DIR):
+    texts = {}
+    for file_name in file_names:
+        with open(os.path.join(data_dir, file_name), "r", encoding="utf-8", errors="ignore") as f:
+            texts[file_name] = f.read()
+
+    return cluster_near_duplicates(texts)
+
+
+def load_clusters():
+    if not os.path.exists(DEDUP_CLUSTERS_FILE):
+        return {}
+
+    with open(DEDUP_CLUSTERS_FILE, "r") as f:
+        return json.load(f)
+
+
+def save_clusters(clusters):
+    temporary_path = f"{DEDUP_CLUSTERS_FILE}.tmp"
+
+    with open(temporary_path, "w") as f:
+        json.dump(clusters, f, indent=1, sort_keys=True)
+    os.replace(temporary_path, DEDUP_CLUSTERS_FILE)
+
+
+def duplicate_file_names(clusters):
+    return {file_name for duplicates in clusters.values() for file_name in duplicates}
@@ -1,5 +1,38 @@
+from collections import defaultdict
+
 from llama_index.core.node_parser import MarkdownNodeParser
+from llama_index.core.schema import RelatedNodeInfo
+
+from cleaning import load_readme_cleaner
 
 
 def load_document_parser():
     return MarkdownNodeParser(chunk_size=512)
+
+
+def assign_chunk_ids(nodes):
+    # Deterministic "<file>:<chunk>" ids let a re-embedded README overwrite its old vectors
+    chunk_counts = defaultdict(int)
+    chunk_ids = {}
+
+    for node in nodes:
+        chunk_ids[node.node_id] = f"{node.ref_doc_id}:{chunk_counts[node.ref_doc_id]}"
+        chunk_counts[node.ref_doc_id] += 1
+
+    for node in nodes:
+        node.id_ = chunk_ids[node.node_id]
+
+        for related_node in node.relationships.values():
+            if isinstance(related_node, RelatedNodeInfo) and related_node.node_id in chunk_ids:
+                related_node.node_id = chunk_ids[related_node.node_id]
+
+    return nodes
+
+
+def parse_documents(documents, show_progress=False):
+    # Badges, HTML, long code listings etc. are stripped before chunking so they are never embedded
+    documents = load_readme_cleaner()(documents)
+
+    return assign_chunk_ids(
+        load_document_parser().get_nodes_from_documents(documents, show_progress=show_progress)
+    )
@@ -1,7 +1,50 @@
+import json
+import os
+import re
+
 from llama_index.core import SimpleDirectoryReader
 
-from config import DATA_DIR
+from config import DATA_DIR, PROJECT_METADATA_FILE
+
+
+def load_project_metadata():
+    if not os.path.exists(PROJECT_METADATA_FILE):
+        return {}
+
+    with open(PROJECT_METADATA_FILE, "r") as f:
+        return json.load(f)
+
+
+def metadata_slug(value):
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-")
+
+
+def readme_metadata(metadata):
+    # Vector stores reject null metadata, and courses are stored as slugs
+    # ("mlops-zoomcamp") so retrieval filters match however the CSV spelled them
+    metadata = {key: value for key, value in metadata.items() if value is not None}
+    if "course" in metadata:
+        metadata["course"] = metadata_slug(metadata["course"])
+
+    return metadata
+
+
+def iter_documents(file_names, project_metadata=None):
+    if not file_names:
+        return
+
+    if project_metadata is None:
+        project_metadata = load_project_metadata()
 
+    reader = SimpleDirectoryReader(
+        input_files=[os.path.join(DATA_DIR, file_name) for file_name in file_names]
+    )
 
-def load_documents():
-    return SimpleDirectoryReader(DATA_DIR).load_data()
+    # iter_data reads one file at a time instead of loading the whole directory up front
+    for documents in reader.iter_data():
+        for document in documents:
+            document.id_ = document.metadata["file_name"]
+            document.metadata.update(readme_metadata(project_metadata.get(document.id_, {})))
+            # The URL only costs embedding tokens, the LLM still sees it to link the project
+            document.excluded_embed_metadata_keys.append("repo_url")
+            yield document
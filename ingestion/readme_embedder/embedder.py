@@ -1,19 +1,99 @@
-from llama_index.core import VectorStoreIndex, StorageContext
-
-from config import EMBEDDINGS_MODEL_NAME, INDEX_NAME
-from document_parser import load_document_parser
-from documents import load_documents
-from vector_store import load_vector_store
+from config import (
+    DEDUP_CLUSTERS_FILE,
+    DEDUP_ENABLED,
+    EMBEDDINGS_MODEL_NAME,
+    INDEX_NAME,
+    LOCAL_INDEX_DIR,
+    VECTOR_STORE_BACKEND,
+)
+from dedup import duplicate_file_names, find_duplicates, save_clusters
+from documents import load_project_metadata
+from manifest import current_file_hashes, diff_manifest, load_manifest, save_manifest
+from pipeline import backfill_sparse_index, run_pipeline
+from upserter import UpsertCheckpoint, delete_nodes, run_fingerprint
+from vector_store import load_sparse_index, load_vector_store
 from embed_model import load_embed_model
 
-storage_context = StorageContext.from_defaults(vector_store=load_vector_store())
 
-index = VectorStoreIndex.from_documents(
-    load_documents(),
-    storage_context=storage_context,
-    embed_model=load_embed_model(),
-    transformations=[load_document_parser()],
-    show_progress=True,
-)
+def main():
+    vector_store = load_vector_store()
+    sparse_index = load_sparse_index()
+
+    manifest = load_manifest()
+    project_metadata = load_project_metadata()
+    file_hashes = current_file_hashes(project_metadata=project_metadata)
+
+    # Near-duplicates are left out as if they had been deleted, so a README that turns into one
+    # has its vectors removed like any other
+    clusters = find_duplicates(file_hashes) if DEDUP_ENABLED else {}
+    save_clusters(clusters)
+    duplicates = duplicate_file_names(clusters)
+    file_hashes = {
+        file_name: content_hash for file_name, content_hash in file_hashes.items()
+        if file_name not in duplicates
+    }
+
+    changes = diff_manifest(manifest, file_hashes)
+
+    file_names = changes["new"] + changes["changed"]
+
+    # The local index only exists once persisted, so there is nothing to resume into
+    checkpoint = None if VECTOR_STORE_BACKEND == "local" else UpsertCheckpoint(
+        run_fingerprint({file_name: file_hashes[file_name] for file_name in file_names})
+    )
+
+    node_ids = run_pipeline(
+        file_names,
+        project_metadata=project_metadata,
+        vector_store=vector_store,
+        embed_model=load_embed_model(),
+        checkpoint=checkpoint,
+        sparse_index=sparse_index,
+    )
+
+    # Fused with the vector results, a keyword index over only some READMEs would rank those
+    # above the rest, so it always covers every README in the manifest
+    sparse_missing = sorted(set(changes["unchanged"]) - sparse_index.ref_doc_ids())
+    if sparse_missing:
+        print(f"Adding {len(sparse_missing)} already embedded READMEs to the keyword index")
+        backfill_sparse_index(sparse_missing, sparse_index, project_metadata)
+
+    # Changed READMEs overwrite their chunks in place, only the ids they no longer produce are stale
+    stale_node_ids = [
+        node_id
+        for file_name in changes["changed"] + changes["removed"]
+        for node_id in set(manifest[file_name]["node_ids"]) - set(node_ids[file_name])
+    ]
+    if stale_node_ids:
+        delete_nodes(vector_store, stale_node_ids)
+        sparse_index.delete_nodes(stale_node_ids)
+
+    # Remote stores are written as nodes are added, the local index is built here
+    vector_store.persist(LOCAL_INDEX_DIR)
+    sparse_index.persist()
+
+    for file_name in changes["removed"]:
+        del manifest[file_name]
+    for file_name in changes["new"] + changes["changed"]:
+        manifest[file_name] = {"hash": file_hashes[file_name], "node_ids": node_ids[file_name]}
+    save_manifest(manifest)
+
+    print(
+        f"New: {len(changes['new'])}, changed: {len(changes['changed'])}, "
+        f"unchanged: {len(changes['unchanged'])}, removed: {len(changes['removed'])} READMEs; "
+        f"embedded {sum(map(len, node_ids.values()))} chunks, "
+        f"deleted {len(stale_node_ids)} stale chunks"
+    )
+    print(
+        f"Skipped {len(duplicates)} near-duplicate READMEs in {len(clusters)} clusters, "
+        f"see {DEDUP_CLUSTERS_FILE}"
+    )
+
+    destination = f"local index {LOCAL_INDEX_DIR}" if VECTOR_STORE_BACKEND == "local" \
+        else f"Pinecone Index {INDEX_NAME}"
+    print(f"✅ Embeddings saved to {destination} using model {EMBEDDINGS_MODEL_NAME}")
+
 
-print(f"✅ Embeddings saved to Pinecone Index {INDEX_NAME} using model {EMBEDDINGS_MODEL_NAME}")
+# Parse workers may re-import this module, so only run when executed as a script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+
+from config import (
+    CLEANING_VERSION,
+    DATA_DIR,
+    MANIFEST_FILE,
+    MAX_CODE_BLOCK_LINES,
+    README_CLEANING_RULES,
+    VECTOR_STORE_BACKEND,
+)
+
+
+def manifest_path():
+    return MANIFEST_FILE.format(backend=VECTOR_STORE_BACKEND)
+
+
+def load_manifest():
+    if not os.path.exists(manifest_path()):
+        return {}
+
+    with open(manifest_path(), "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    temporary_path = f"{manifest_path()}.tmp"
+
+    with open(temporary_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temporary_path, manifest_path())
+
+
+def cleaning_config():
+    return {
+        "version": CLEANING_VERSION,
+        "rules": sorted(README_CLEANING_RULES),
+        "max_code_block_lines": MAX_CODE_BLOCK_LINES,
+    }
+
+
+def file_hash(path, metadata=None):
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+
+    # Chunks carry the project metadata too, so a metadata change re-embeds the README
+    if metadata:
+        digest.update(json.dumps(metadata, sort_keys=True).encode("utf-8"))
+
+    # As does the cleaning, which runs before chunking
+    digest.update(json.dumps(cleaning_config()).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def current_file_hashes(data_dir=DATA_DIR, project_metadata=None):
+    project_metadata = project_metadata or {}
+
+    return {
+        file_name: file_hash(os.path.join(data_dir, file_name), project_metadata.get(file_name))
+        for file_name in sorted(os.listdir(data_dir))
+        if os.path.isfile(os.path.join(data_dir, file_name))
+    }
+
+
+def diff_manifest(manifest, file_hashes):
+    changes = {"new": [], "changed": [], "unchanged": [], "removed": []}
+
+    for file_name, content_hash in file_hashes.items():
+        if file_name not in manifest:
+            changes["new"].append(file_name)
+        elif manifest[file_name]["hash"] != content_hash:
+            changes["changed"].append(file_name)
+        else:
+            changes["unchanged"].append(file_name)
+
+    changes["removed"] = sorted(set(manifest) - set(file_hashes))
+
+    return changes
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from llama_index.core.schema import MetadataMode
+
+from config import EMBED_BATCH_SIZE, PARSE_BATCH_SIZE, PARSE_WORKERS
+from document_parser import parse_documents
+from documents import iter_documents
+from upserter import BatchUpserter
+
+
+class PipelineStats:
+    def __init__(self):
+        self.items = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage, items, seconds):
+        with self._lock:
+            self.items[stage] += items
+            self.seconds[stage] += seconds
+
+    def report(self):
+        for stage in self.items:
+            seconds = self.seconds[stage]
+            rate = self.items[stage] / seconds if seconds else 0.0
+            print(f"{stage:>6}: {self.items[stage]} in {seconds:.1f}s ({rate:.1f}/s)")
+
+        print(f"  wall: {time.perf_counter() - self.started_at:.1f}s")
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def timed_parse(documents):
+    started_at = time.perf_counter()
+    nodes = parse_documents(documents)
+    return nodes, time.perf_counter() - started_at
+
+
+def read_documents(file_names, stats, project_metadata=None):
+    documents = iter_documents(file_names, project_metadata)
+
+    while True:
+        started_at = time.perf_counter()
+        document = next(documents, None)
+        if document is None:
+            return
+
+        stats.record("read", 1, time.perf_counter() - started_at)
+        yield document
+
+
+def parse_in_pool(documents, stats, workers=PARSE_WORKERS):
+    # Only a couple of batches per worker are in flight, so memory doesn't grow with the corpus
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+
+        for document_batch in batched(documents, PARSE_BATCH_SIZE):
+            in_flight.append((len(document_batch), pool.submit(timed_parse, document_batch)))
+
+            if len(in_flight) >= 2 * workers:
+                yield from collect_parsed(in_flight.popleft(), stats)
+
+        while in_flight:
+            yield from collect_parsed(in_flight.popleft(), stats)
+
+
+def collect_parsed(parse_job, stats):
+    document_count, future = parse_job
+    nodes, seconds = future.result()
+    stats.record("parse", document_count, seconds)
+    return nodes
+
+
+def embed_batches(nodes, embed_model, stats, batch_size=EMBED_BATCH_SIZE):
+    for node_batch in batched(nodes, batch_size):
+        started_at = time.perf_counter()
+        embeddings = embed_model.get_text_embedding_batch(
+            [node.get_content(metadata_mode=MetadataMode.EMBED) for node in node_batch]
+        )
+
+        for node, embedding in zip(node_batch, embeddings):
+            node.embedding = embedding
+
+        stats.record("embed", len(node_batch), time.perf_counter() - started_at)
+        yield node_batch
+
+
+def run_pipeline(
+    file_names,
+    vector_store,
+    embed_model,
+    checkpoint=None,
+    project_metadata=None,
+    sparse_index=None,
+):
+    stats = PipelineStats()
+    node_ids = defaultdict(list)
+    resume_from = checkpoint.acknowledged_nodes() if checkpoint else 0
+
+    if resume_from:
+        print(f"Resuming after {resume_from} chunks acknowledged by an interrupted run")
+
+    def unacknowledged(nodes):
+        # Chunk order and ids are deterministic, so the first resume_from were already written
+        for position, node in enumerate(nodes):
+            node_ids[node.ref_doc_id].append(node.node_id)
+
+            # The keyword index is only written at the end of a run, so it takes every chunk
+            if sparse_index is not None:
+                sparse_index.add([node])
+
+            if position >= resume_from:
+                yield node
+
+    nodes = unacknowledged(parse_in_pool(
+        read_documents(file_names, stats, project_metadata), stats
+    ))
+    upserter = BatchUpserter(
+        vector_store, stats=stats, checkpoint=checkpoint, acknowledged_nodes=resume_from
+    )
+
+    try:
+        for node_batch in embed_batches(nodes, embed_model, stats):
+            upserter.submit(node_batch)
+    finally:
+        upserter.close()
+
+    stats.report()
+    return node_ids
+
+
+def backfill_sparse_index(file_names, sparse_index, project_metadata=None):
+    # READMEs that are embedded already but missing from the keyword index (it was deleted, or
+    # predates them) are only parsed, chunking is deterministic so the node ids match
+    stats = PipelineStats()
+
+    for node in parse_in_pool(read_documents(file_names, stats, project_metadata), stats):
+        sparse_index.add([node])
+
+    stats.report()
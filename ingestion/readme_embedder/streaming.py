@@ -0,0 +1,120 @@
+import os
+import threading
+from queue import Queue
+
+from config import DATA_DIR, EMBED_BATCH_SIZE, EMBED_QUEUE_SIZE, LOCAL_INDEX_DIR
+from dedup import duplicate_file_names, load_clusters
+from document_parser import parse_documents
+from documents import iter_documents, load_project_metadata
+from embed_model import load_embed_model
+from manifest import file_hash, load_manifest, save_manifest
+from pipeline import PipelineStats, embed_batches
+from upserter import BatchUpserter, delete_nodes
+from vector_store import load_sparse_index, load_vector_store
+
+
+class StreamingEmbedder:
+    # Embeds READMEs as they are handed over (e.g. by the crawler) on a background thread,
+    # keeping the manifest up to date so a later embedder.py run sees them as unchanged
+    def __init__(self, queue_size=EMBED_QUEUE_SIZE):
+        self.vector_store = load_vector_store()
+        self.sparse_index = load_sparse_index()
+        self.manifest = load_manifest()
+        self.stats = PipelineStats()
+        self.upserter = BatchUpserter(self.vector_store, stats=self.stats)
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0, "duplicate": 0}
+
+        # Clustering needs every README, so while crawling only the duplicates found by the last
+        # embedder.py run are skipped, new ones are caught by the next run
+        self.duplicates = duplicate_file_names(load_clusters())
+        self.project_metadata = load_project_metadata()
+        self.error = None
+
+        self._queue = Queue(maxsize=queue_size)
+        self._embedded = {}
+        self._thread = threading.Thread(target=self._run, name="readme-embedder", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, file_name, metadata=None):
+        if self.error:
+            raise self.error
+
+        if metadata is not None:
+            self.project_metadata[file_name] = metadata
+
+        # Blocks while the queue is full, which is what holds the crawl back
+        self._queue.put(file_name)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.upserter.close()
+
+        if self.error:
+            raise self.error
+
+        stale_node_ids = []
+        for file_name, (content_hash, node_ids) in self._embedded.items():
+            previous_node_ids = self.manifest.get(file_name, {}).get("node_ids", [])
+            stale_node_ids += set(previous_node_ids) - set(node_ids)
+            self.manifest[file_name] = {"hash": content_hash, "node_ids": node_ids}
+
+        if stale_node_ids:
+            delete_nodes(self.vector_store, stale_node_ids)
+            self.sparse_index.delete_nodes(stale_node_ids)
+
+        self.vector_store.persist(LOCAL_INDEX_DIR)
+        self.sparse_index.persist()
+        save_manifest(self.manifest)
+
+        self.stats.report()
+        print(
+            f"New: {self.counts['new']}, changed: {self.counts['changed']}, "
+            f"unchanged: {self.counts['unchanged']}, near-duplicate: {self.counts['duplicate']} "
+            "READMEs embedded while crawling"
+        )
+
+    def _run(self):
+        try:
+            self._embed_queued(load_embed_model())
+        except Exception as error:
+            self.error = error
+
+            # Keep draining so a blocked submit() wakes up and sees the error
+            while self._queue.get() is not None:
+                pass
+
+    def _embed_queued(self, embed_model):
+        pending_nodes = []
+
+        for file_name in iter(self._queue.get, None):
+            if file_name in self.duplicates:
+                self.counts["duplicate"] += 1
+                continue
+
+            metadata = self.project_metadata.get(file_name)
+            content_hash = file_hash(os.path.join(DATA_DIR, file_name), metadata)
+            previous = self.manifest.get(file_name)
+
+            if previous and previous["hash"] == content_hash:
+                self.counts["unchanged"] += 1
+                continue
+
+            self.counts["changed" if previous else "new"] += 1
+            nodes = parse_documents(list(iter_documents([file_name], self.project_metadata)))
+            self._embedded[file_name] = (content_hash, [node.node_id for node in nodes])
+            self.sparse_index.add(nodes)
+            pending_nodes += nodes
+
+            # Fill batches while downloads keep coming, but don't sit on chunks when idle
+            if len(pending_nodes) >= EMBED_BATCH_SIZE or self._queue.empty():
+                self._embed(pending_nodes, embed_model)
+                pending_nodes = []
+
+        self._embed(pending_nodes, embed_model)
+
+    def _embed(self, nodes, embed_model):
+        for node_batch in embed_batches(nodes, embed_model, self.stats):
+            self.upserter.submit(node_batch)
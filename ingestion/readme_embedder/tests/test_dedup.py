@@ -0,0 +1,39 @@
+import unittest
+
+from dedup import cluster_near_duplicates
+
+
+def words(start, end, prefix="word"):
+    return " ".join(f"{prefix}{number}" for number in range(start, end))
+
+
+class ClusterNearDuplicatesTest(unittest.TestCase):
+    def test_clusters_copies_under_the_longest_readme(self):
+        texts = {
+            "fork.md": words(0, 200),
+            "original.md": words(0, 200) + " extra setup notes",
+            "other.md": words(0, 200, prefix="term"),
+        }
+
+        self.assertEqual(cluster_near_duplicates(texts), {"original.md": ["fork.md"]})
+
+    def test_does_not_chain_dissimilar_readmes(self):
+        # a~b and b~c, but a and c share too little to be duplicates of each other. c is the
+        # longest (its word numbers are), so b joins it and a stays on its own
+        texts = {
+            "a.md": words(0, 300),
+            "b.md": words(30, 330),
+            "c.md": words(60, 360),
+        }
+
+        clusters = cluster_near_duplicates(texts, threshold=0.74)
+        self.assertEqual(clusters, {"c.md": ["b.md"]})
+
+    def test_keeps_distinct_readmes(self):
+        texts = {"a.md": words(0, 100), "b.md": words(100, 200)}
+
+        self.assertEqual(cluster_near_duplicates(texts), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
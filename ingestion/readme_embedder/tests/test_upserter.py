@@ -0,0 +1,145 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from pipeline import PipelineStats
+from upserter import BatchUpserter, UpsertCheckpoint, delete_nodes
+
+
+class Throttled(Exception):
+    status = 429
+
+
+class FakeVectorStore:
+    # Stands in for Pinecone: nodes are plain ints, failures are scripted per batch
+    def __init__(self, failures=None, delay=0.0):
+        self.failures = failures or {}
+        self.delay = delay
+        self.added = []
+        self.deletes = []
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def add(self, batch):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failures = self.failures.get(batch[0])
+
+        try:
+            time.sleep(self.delay)
+            if failures:
+                with self._lock:
+                    error = failures.pop(0)
+                raise error
+
+            with self._lock:
+                self.added.extend(batch)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def delete_nodes(self, node_ids):
+        self.deletes.append(node_ids)
+
+
+class BatchUpserterTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = PipelineStats()
+        self.checkpoint = UpsertCheckpoint(
+            "fingerprint", path=os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+        )
+
+    def make_upserter(self, vector_store, **kwargs):
+        kwargs = {"batch_size": 10, "max_in_flight": 1, "backoff_seconds": 0.0, **kwargs}
+        return BatchUpserter(vector_store, self.stats, checkpoint=self.checkpoint, **kwargs)
+
+    def upsert(self, upserter, nodes):
+        for start in range(0, len(nodes), 7):
+            upserter.submit(nodes[start:start + 7])
+        upserter.close()
+
+    def test_writes_every_node_in_batches(self):
+        vector_store = FakeVectorStore()
+        self.upsert(self.make_upserter(vector_store), list(range(25)))
+
+        self.assertEqual(sorted(vector_store.added), list(range(25)))
+        self.assertEqual(vector_store.calls, 3)
+        self.assertEqual(self.stats.items["upsert"], 25)
+
+    def test_retries_throttled_batches(self):
+        vector_store = FakeVectorStore(failures={10: [Throttled("429"), Throttled("429")]})
+        self.upsert(self.make_upserter(vector_store), list(range(30)))
+
+        self.assertEqual(sorted(vector_store.added), list(range(30)))
+        self.assertEqual(self.stats.items["retry"], 2)
+
+    def test_gives_up_after_max_retries(self):
+        vector_store = FakeVectorStore(failures={0: [Throttled("429")] * 3})
+
+        with self.assertRaises(Throttled):
+            self.upsert(self.make_upserter(vector_store, max_retries=2), list(range(10)))
+        self.assertEqual(vector_store.calls, 3)
+
+    def test_does_not_retry_other_errors(self):
+        vector_store = FakeVectorStore(failures={0: [ValueError("bad vector")]})
+
+        with self.assertRaises(ValueError):
+            self.upsert(self.make_upserter(vector_store), list(range(10)))
+        self.assertEqual(vector_store.calls, 1)
+
+    def test_limits_batches_in_flight(self):
+        vector_store = FakeVectorStore(delay=0.02)
+        self.upsert(self.make_upserter(vector_store, max_in_flight=3), list(range(200)))
+
+        self.assertEqual(sorted(vector_store.added), list(range(200)))
+        self.assertLessEqual(vector_store.max_in_flight, 3)
+        self.assertGreater(vector_store.max_in_flight, 1)
+
+    def test_resumes_after_the_last_acknowledged_batch(self):
+        nodes = list(range(50))
+        failing = FakeVectorStore(failures={30: [ValueError("bad vector")]})
+
+        with self.assertRaises(ValueError):
+            self.upsert(self.make_upserter(failing), nodes)
+        acknowledged = self.checkpoint.acknowledged_nodes()
+        self.assertEqual(acknowledged, 30)
+
+        vector_store = FakeVectorStore()
+        upserter = self.make_upserter(vector_store, acknowledged_nodes=acknowledged)
+        self.upsert(upserter, nodes[acknowledged:])
+
+        self.assertEqual(sorted(vector_store.added), list(range(30, 50)))
+        self.assertFalse(os.path.exists(self.checkpoint.path))
+
+    def test_checkpoint_waits_for_earlier_batches(self):
+        upserter = self.make_upserter(FakeVectorStore())
+        upserter._acknowledge(10, 20)
+        self.assertEqual(self.checkpoint.acknowledged_nodes(), 0)
+
+        upserter._acknowledge(0, 10)
+        self.assertEqual(self.checkpoint.acknowledged_nodes(), 20)
+
+    def test_ignores_checkpoint_of_other_input(self):
+        self.checkpoint.save(40)
+
+        other = UpsertCheckpoint("other fingerprint", path=self.checkpoint.path)
+        self.assertEqual(other.acknowledged_nodes(), 0)
+
+
+class DeleteNodesTest(unittest.TestCase):
+    def test_deletes_in_batches(self):
+        vector_store = FakeVectorStore()
+        delete_nodes(vector_store, [f"node-{n}" for n in range(2500)], batch_size=1000)
+
+        self.assertEqual([len(node_ids) for node_ids in vector_store.deletes], [1000, 1000, 500])
+        self.assertEqual(vector_store.deletes[2][-1], "node-2499")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    CHECKPOINT_FILE,
+    DELETE_BATCH_SIZE,
+    RETRYABLE_STATUSES,
+    UPSERT_BACKOFF_SECONDS,
+    UPSERT_BATCH_SIZE,
+    UPSERT_MAX_IN_FLIGHT,
+    UPSERT_MAX_RETRIES,
+)
+
+
+def is_retryable(error):
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    return status in RETRYABLE_STATUSES or "429" in str(error) or "Too Many Requests" in str(error)
+
+
+def delete_nodes(vector_store, node_ids, batch_size=DELETE_BATCH_SIZE):
+    node_ids = list(node_ids)
+
+    for start in range(0, len(node_ids), batch_size):
+        vector_store.delete_nodes(node_ids[start:start + batch_size])
+
+
+def run_fingerprint(file_hashes):
+    return hashlib.sha256(json.dumps(sorted(file_hashes.items())).encode("utf-8")).hexdigest()
+
+
+class UpsertCheckpoint:
+    # Only valid for the same set of files, any change to the input starts over
+    def __init__(self, fingerprint, path=CHECKPOINT_FILE):
+        self.fingerprint = fingerprint
+        self.path = path
+
+    def acknowledged_nodes(self):
+        if not os.path.exists(self.path):
+            return 0
+
+        with open(self.path, "r") as f:
+            checkpoint = json.load(f)
+
+        if checkpoint["fingerprint"] != self.fingerprint:
+            return 0
+
+        return checkpoint["acknowledged_nodes"]
+
+    def save(self, acknowledged_nodes):
+        temporary_path = f"{self.path}.tmp"
+
+        checkpoint = {"fingerprint": self.fingerprint, "acknowledged_nodes": acknowledged_nodes}
+        with open(temporary_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BatchUpserter:
+    def __init__(
+        self,
+        vector_store,
+        stats,
+        checkpoint=None,
+        acknowledged_nodes=0,
+        batch_size=UPSERT_BATCH_SIZE,
+        max_in_flight=UPSERT_MAX_IN_FLIGHT,
+        max_retries=UPSERT_MAX_RETRIES,
+        backoff_seconds=UPSERT_BACKOFF_SECONDS,
+    ):
+        self.vector_store = vector_store
+        self.stats = stats
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="upsert")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._futures = []
+
+        # Positions in the node stream: batches finish out of order, but the checkpoint only
+        # moves past a batch once every batch before it is acknowledged too
+        self._next_start = acknowledged_nodes
+        self._acknowledged = acknowledged_nodes
+        self._completed = {}
+
+    def submit(self, nodes):
+        self._buffer.extend(nodes)
+
+        while len(self._buffer) >= self.batch_size:
+            self._dispatch(self._buffer[:self.batch_size])
+            self._buffer = self._buffer[self.batch_size:]
+
+    def close(self):
+        if self._buffer:
+            self._dispatch(self._buffer)
+            self._buffer = []
+
+        self._executor.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+
+        if self.checkpoint:
+            self.checkpoint.clear()
+
+    def _dispatch(self, batch):
+        # Blocks the producer while max_in_flight batches are still being written
+        self._slots.acquire()
+
+        start = self._next_start
+        self._next_start += len(batch)
+
+        future = self._executor.submit(self._upsert, start, batch)
+        future.add_done_callback(lambda _: self._slots.release())
+
+        # Fail fast on a batch that ran out of retries instead of embedding everything first
+        for finished in [pending for pending in self._futures if pending.done()]:
+            finished.result()
+            self._futures.remove(finished)
+        self._futures.append(future)
+
+    def _upsert(self, start, batch):
+        for attempt in range(self.max_retries + 1):
+            started_at = time.perf_counter()
+
+            try:
+                self.vector_store.add(batch)
+                break
+            except Exception as error:
+                if attempt == self.max_retries or not is_retryable(error):
+                    raise
+
+                delay = self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.5)
+                self.stats.record("retry", 1, delay)
+                time.sleep(delay)
+
+        self.stats.record("upsert", len(batch), time.perf_counter() - started_at)
+        self._acknowledge(start, start + len(batch))
+
+    def _acknowledge(self, start, end):
+        with self._lock:
+            self._completed[start] = end
+
+            while self._acknowledged in self._completed:
+                self._acknowledged = self._completed.pop(self._acknowledged)
+
+            if self.checkpoint:
+                self.checkpoint.save(self._acknowledged)
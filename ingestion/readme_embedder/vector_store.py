@@ -3,10 +3,19 @@ import os
 from llama_index.vector_stores.pinecone import PineconeVectorStore
 from pinecone import Pinecone
 
-from config import EMBEDDING_DIMENSION, INDEX_NAME, INDEX_SPEC
+from agent.local_vector_store import LocalVectorStore
+from agent.sparse_index import SparseIndex
+from config import (
+    EMBEDDING_DIMENSION,
+    INDEX_NAME,
+    INDEX_SPEC,
+    LOCAL_INDEX_DIR,
+    SPARSE_INDEX_FILE,
+    VECTOR_STORE_BACKEND,
+)
 
 
-def load_vector_store():
+def load_pinecone_vector_store():
     pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
 
     if not pc.has_index(INDEX_NAME):
@@ -18,3 +27,21 @@ def load_vector_store():
         )
 
     return PineconeVectorStore(pc.Index(INDEX_NAME))
+
+
+def load_local_vector_store():
+    return LocalVectorStore(persist_dir=LOCAL_INDEX_DIR)
+
+
+VECTOR_STORE_BACKENDS = {
+    "pinecone": load_pinecone_vector_store,
+    "local": load_local_vector_store,
+}
+
+
+def load_vector_store(backend=VECTOR_STORE_BACKEND):
+    return VECTOR_STORE_BACKENDS[backend]()
+
+
+def load_sparse_index():
+    return SparseIndex(SPARSE_INDEX_FILE)